@@ -1,44 +1,59 @@
 import os
 import docx
-from docx.shared import Pt
-from langchain.chat_models import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
 from tqdm import tqdm
+from translation_memory import TranslationMemory
+from async_engine import AsyncTranslationEngine
+from skiplist import SkipFilter
+from glossary import PLACEHOLDER_INSTRUCTIONS, load_glossary
+from runs import TAG_INSTRUCTIONS, TaggedParagraph, add_translated_runs
 
-def translate_text_gpt4(content, llm):
-    messages = [
-        SystemMessage(content=(
-            "You are a professional Hindi translator. Translate the following text into Hindi while retaining the meaning, "
-            "context, and tone. However, do not translate any financial terms, terminology, or phrases. Keep all financial "
-            "terms in English as is."
-        )),
-        HumanMessage(content=content)
-    ]
-    response = llm(messages)
-    return response.content.strip()
+SYSTEM_PROMPT = (
+    "You are a professional Hindi translator. Translate the following text into Hindi while retaining the meaning, "
+    "context, and tone. However, do not translate any financial terms, terminology, or phrases. Keep all financial "
+    "terms in English as is."
+) + TAG_INSTRUCTIONS + PLACEHOLDER_INSTRUCTIONS
 
-def process_docx(input_file, output_file, llm):
+def translate_body_texts(doc, llm, memory, tagged_paras, max_concurrency=8, pack_tokens=None):
+    # Translate every distinct paragraph and cell text of the body concurrently up front;
+    # paragraphs go out once each with their runs tagged
+    texts = []
+    for element in doc.element.body:
+        if element.tag.endswith('p'):
+            tagged = TaggedParagraph(docx.text.paragraph.Paragraph(element, doc))
+            tagged_paras[element] = tagged
+            texts.append(tagged.text)
+        elif element.tag.endswith('tbl'):
+            table = docx.table.Table(element, doc)
+            texts.extend(cell.text.strip() for row in table.rows for cell in row.cells)
+    unique = list(dict.fromkeys(text for text in texts if text.strip()))
+    engine = AsyncTranslationEngine(
+        llm, SYSTEM_PROMPT, max_concurrency=max_concurrency, memory=memory, pack_tokens=pack_tokens
+    )
+    # Numbers, codes, dates and text already in Hindi pass through untranslated
+    # and glossary terms are masked with placeholders, restored after translation
+    skip = SkipFilter()
+    glossary = load_glossary()
+    translations = dict(zip(unique, skip.wrap(glossary.wrap(engine.translate_batch))(unique)))
+    print(skip.report())
+    print(glossary.report())
+    return translations
+
+def process_docx(input_file, output_file, llm, max_concurrency=8, pack_tokens=None):
+    memory = TranslationMemory(backend="langchain-openai", model=getattr(llm, "model_name", ""), prompt=SYSTEM_PROMPT)
     doc = docx.Document(input_file)
     translated_doc = docx.Document()
-    total_items = len(doc.paragraphs) + sum(len(table.rows) for table in doc.tables)
-    pbar = tqdm(total=total_items, desc="Translating")
+    tagged_paras = {}
+    translations = translate_body_texts(doc, llm, memory, tagged_paras, max_concurrency, pack_tokens)
+    # One step per body element (paragraph, table, section properties, ...)
+    pbar = tqdm(total=len(doc.element.body), desc="Writing")
 
     for element in doc.element.body:
         if element.tag.endswith('p'):
             para = docx.text.paragraph.Paragraph(element, doc)
             new_para = translated_doc.add_paragraph()
-            for run in para.runs:
-                text = run.text.strip()
-                if text:
-                    translated_text = translate_text_gpt4(text, llm)
-                    new_run = new_para.add_run(translated_text)
-                    new_run.bold = run.bold
-                    new_run.italic = run.italic
-                    new_run.underline = run.underline
-                    new_run.font.size = run.font.size
-                    new_run.font.name = run.font.name
-                else:
-                    new_para.add_run()
+            tagged = tagged_paras[element]
+            if tagged.text.strip():
+                add_translated_runs(new_para, tagged, translations[tagged.text])
             new_para.alignment = para.alignment
             pbar.update(1)
         elif element.tag.endswith('tbl'):
@@ -48,19 +63,21 @@ def process_docx(input_file, output_file, llm):
                 new_row = new_table.add_row()
                 for idx, cell in enumerate(row.cells):
                     text = cell.text.strip()
-                    translated_text = translate_text_gpt4(text, llm) if text else ''
+                    translated_text = translations[text] if text else ''
                     new_row.cells[idx].text = translated_text
-                pbar.update(1)
+            pbar.update(1)
         else:
             translated_doc.element.body.append(element)
             pbar.update(1)
 
     pbar.close()
     translated_doc.save(output_file)
+    print(memory.report())
     print(f"Translated document saved to: {output_file}")
 
 if __name__ == "__main__":
     os.environ["OPENAI_API_KEY"] = "your open ai key"  # Replace with your OpenAI API key
+    from langchain.chat_models import ChatOpenAI
     llm = ChatOpenAI(model_name="gpt-4o", temperature=0)
     input_file = "input.docx"
     output_file = "output_hindi_custom_prompt.docx"
@@ -1,76 +1,53 @@
 import os
-import time
 from typing import Optional
-from docx import Document
-from docx.shared import Pt
-from langchain.chat_models import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
-from tqdm import tqdm
+from translation_memory import TranslationMemory
+from glossary import PLACEHOLDER_INSTRUCTIONS, load_glossary
+from async_engine import AsyncTranslationEngine
+from backends import OpenAIBackend
+from pipeline import summary_line, translate_document
+from runs import TAG_INSTRUCTIONS
+
+SYSTEM_PROMPT = "You are a professional Hindi translator. You are Finance Expert. You'll not translate Financial Terms and keep them as it is. Translate the following text into Hindi while retaining the meaning, context, and tone." + TAG_INSTRUCTIONS + PLACEHOLDER_INSTRUCTIONS
 
 class DocumentProcessor:
-    def __init__(self, api_key: str, model_name: str = "gpt-4o"):
+    def __init__(self, api_key: str, model_name: str = "gpt-4o", max_concurrency: int = 8,
+                 requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None,
+                 pack_tokens: Optional[int] = None, deadline: Optional[float] = None):
+        # Imported here so importing this module (e.g. for SYSTEM_PROMPT) stays cheap
+        from langchain.chat_models import ChatOpenAI
         self.llm = ChatOpenAI(
             api_key=api_key,
             model_name=model_name,
             temperature=0
         )
-        self.max_retries = 3
-        self.retry_delay = 2
-
-    def translate_text(self, text: str) -> str:
-        if not text.strip():
-            return text
-            
-        messages = [
-            SystemMessage(content="You are a professional Hindi translator. You are Finance Expert. You'll not translate Financial Terms and keep them as it is. Translate the following text into Hindi while retaining the meaning, context, and tone."),
-            HumanMessage(content=text)
-        ]
-        
-        for attempt in range(self.max_retries):
-            try:
-                response = self.llm(messages)
-                return response.content.strip()
-            except Exception as e:
-                print(f"Translation attempt {attempt + 1} failed: {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay)
-        return text
+        self.model_name = model_name
+        self.memory = TranslationMemory(backend="langchain-openai", model=model_name, prompt=SYSTEM_PROMPT)
+        self.engine = AsyncTranslationEngine(
+            self.llm, SYSTEM_PROMPT,
+            max_concurrency=max_concurrency,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            memory=self.memory,
+            deadline=deadline,
+            pack_tokens=pack_tokens
+        )
 
-    def process_document(self, input_path: str, output_path: str) -> bool:
+    def process_document(self, input_path: str, output_path: str, previous_source: Optional[str] = None,
+                         previous_output: Optional[str] = None) -> bool:
         try:
-            doc = Document(input_path)
-            total_items = len(doc.paragraphs) + sum(len(table.rows) for table in doc.tables)
-            
-            with tqdm(total=total_items, desc="Translating") as pbar:
-                # Process tables
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            if cell.text.strip():
-                                cell.text = self.translate_text(cell.text)
-                        pbar.update(1)
-
-                # Process paragraphs
-                for para in doc.paragraphs:
-                    if para.text.strip() and not para._element.xpath('.//w:drawing'):
-                        for run in para.runs:
-                            if run.text.strip():
-                                original_format = {
-                                    'bold': run.bold,
-                                    'italic': run.italic,
-                                    'font': run.font.name,
-                                    'size': run.font.size
-                                }
-                                run.text = self.translate_text(run.text)
-                                # Restore formatting
-                                run.bold = original_format['bold']
-                                run.italic = original_format['italic']
-                                run.font.name = original_format['font']
-                                run.font.size = original_format['size']
-                    pbar.update(1)
-
-            # Save document directly
-            doc.save(output_path)
+            # Each paragraph sent once with its runs tagged so the translation maps back
+            # onto the run formatting, every finished segment checkpointed so a crashed
+            # or rate-limited run resumes where it stopped, and given the previous
+            # revision and its translation only new or edited segments are sent
+            glossary = load_glossary()
+            previous = (previous_source, previous_output) if previous_source and previous_output else None
+            backend = OpenAIBackend(translator=self.engine, model_name=self.model_name)
+            summary = translate_document(input_path, output_path, backend, resume=True, tag_runs=True,
+                                         previous=previous, all_stories=True, glossary=glossary)
+            print(summary_line(summary))
+            print(glossary.report())
+            print(self.memory.report())
+            print(self.engine.resilience.report())
             print(f"Translation complete: {output_path}")
             return True
 
@@ -84,9 +61,13 @@ def main():
     
     input_file = "input.docx"
     output_file = "transllllllllll.docx"
+    # For a revised document: its previous revision and that revision's translation
+    # (e.g. "input_v1.docx", "transllllllllll_v1.docx"); unchanged segments then reuse those translations
+    previous_source = None
+    previous_output = None
 
     if os.path.exists(input_file):
-        if processor.process_document(input_file, output_file):
+        if processor.process_document(input_file, output_file, previous_source, previous_output):
             print("Document translated successfully")
         else:
             print("Translation failed")
@@ -1,36 +1,81 @@
 import os
-import time
-import docx
 from docx import Document
-from langchain.chat_models import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
 from tqdm import tqdm
+from translation_memory import TranslationMemory
+from async_engine import AsyncTranslationEngine
+from journal import TranslationJournal
+from incremental import IncrementalTranslation
+from skiplist import SkipFilter
+from glossary import PLACEHOLDER_INSTRUCTIONS, load_glossary
+from runs import TAG_INSTRUCTIONS, TaggedParagraph, add_translated_runs
+
+SYSTEM_PROMPT = (
+    "You are a professional Hindi translator. Translate the following text into Hindi while retaining the meaning, "
+    "context, and tone. However, do not translate any financial terms, terminology, or phrases. Keep all financial "
+    "terms in English as is."
+) + TAG_INSTRUCTIONS + PLACEHOLDER_INSTRUCTIONS
 
 class DocumentTranslator:
-    def __init__(self, llm):
+    def __init__(self, llm, max_concurrency: int = 8, requests_per_minute=None, tokens_per_minute=None,
+                 pack_tokens=None):
         self.llm = llm
         self.max_retries = 3
         self.retry_delay = 2
+        self.memory = TranslationMemory(
+            backend="langchain-openai", model=getattr(llm, "model_name", ""), prompt=SYSTEM_PROMPT
+        )
+        self.engine = AsyncTranslationEngine(
+            llm, SYSTEM_PROMPT,
+            max_concurrency=max_concurrency,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            memory=self.memory,
+            max_retries=self.max_retries,
+            retry_delay=self.retry_delay,
+            pack_tokens=pack_tokens
+        )
 
-    def translate_text_gpt4(self, content):
-        messages = [
-            SystemMessage(content=(
-                "You are a professional Hindi translator. Translate the following text into Hindi while retaining the meaning, "
-                "context, and tone. However, do not translate any financial terms, terminology, or phrases. Keep all financial "
-                "terms in English as is."
-            )),
-            HumanMessage(content=content)
-        ]
-        response = self.llm(messages)
-        return response.content.strip()
-
-    def process_document(self, input_path: str, output_path: str) -> bool:
+    def process_document(self, input_path: str, output_path: str, previous_source: str = None,
+                         previous_output: str = None) -> bool:
         try:
             # Load document
             doc = Document(input_path)
             translated_doc = Document()
+
+            # Translate every distinct cell and paragraph text concurrently up front;
+            # paragraphs go out once each with their runs tagged
+            tagged_paras = [TaggedParagraph(para) for para in doc.paragraphs]
+            texts = [cell.text.strip() for table in doc.tables for row in table.rows for cell in row.cells]
+            texts += [tagged.text for tagged in tagged_paras if tagged.text.strip()]
+            unique = list(dict.fromkeys(text for text in texts if text))
+
+            # Checkpoint every finished segment so a crashed or rate-limited run
+            # resumes from where it stopped instead of paying for it again
+            model_name = getattr(self.llm, "model_name", "")
+            journal = TranslationJournal(input_path, job_key=f"langchain-openai|{model_name}|{SYSTEM_PROMPT}")
+            if journal.resumed:
+                print(f"Resuming: {journal.resumed} segments already translated")
+            translate = journal.wrap(lambda texts: self.engine.translate_batch(texts, on_result=journal.record))
+            # Glossary terms are masked with placeholders and restored after translation
+            glossary = load_glossary()
+            translate = glossary.wrap(translate)
+
+            # Given the previous revision and its translation, only new or edited segments are sent
+            incremental = None
+            if previous_source and previous_output:
+                incremental = IncrementalTranslation(previous_source, previous_output, tag_runs=True)
+                translate = incremental.wrap(translate)
+            # Numbers, codes, dates and text already in Hindi pass through untranslated
+            skip = SkipFilter()
+            translate = skip.wrap(translate)
+            translations = dict(zip(unique, translate(unique)))
+            print(skip.report())
+            print(glossary.report())
+            if incremental is not None:
+                print(incremental.report())
+
             total_items = len(doc.paragraphs) + sum(len(table.rows) for table in doc.tables)
-            pbar = tqdm(total=total_items, desc="Translating")
+            pbar = tqdm(total=total_items, desc="Writing")
 
             # Process tables
             for table in doc.tables:
@@ -39,30 +84,23 @@ class DocumentTranslator:
                     new_row = new_table.add_row()
                     for idx, cell in enumerate(row.cells):
                         text = cell.text.strip()
-                        translated_text = self.translate_text_gpt4(text) if text else ''
+                        translated_text = translations[text] if text else ''
                         new_row.cells[idx].text = translated_text
                     pbar.update(1)
 
             # Process paragraphs (skip images)
-            for para in doc.paragraphs:
+            for para, tagged in zip(doc.paragraphs, tagged_paras):
                 new_para = translated_doc.add_paragraph()
-                for run in para.runs:
-                    text = run.text.strip()
-                    if text:
-                        translated_text = self.translate_text_gpt4(text)
-                        new_run = new_para.add_run(translated_text)
-                        new_run.bold = run.bold
-                        new_run.italic = run.italic
-                        new_run.underline = run.underline
-                        new_run.font.size = run.font.size
-                        new_run.font.name = run.font.name
-                    else:
-                        new_para.add_run()
+                if tagged.text.strip():
+                    add_translated_runs(new_para, tagged, translations[tagged.text])
                 new_para.alignment = para.alignment
                 pbar.update(1)
 
             pbar.close()
             translated_doc.save(output_path)
+            journal.complete()
+            print(self.memory.report())
+            print(self.engine.resilience.report())
             print(f"Translation complete: {output_path}")
             return True
 
@@ -72,13 +110,18 @@ class DocumentTranslator:
 
 def main():
     os.environ["OPENAI_API_KEY"] = "your open ai key"  # Replace with your OpenAI API key
+    from langchain.chat_models import ChatOpenAI
     llm = ChatOpenAI(model_name="gpt-4o", temperature=0)
     translator = DocumentTranslator(llm)
     input_file = "input.docx"
     output_file = "translatdi.docx"
+    # For a revised document: its previous revision and that revision's translation
+    # (e.g. "input_v1.docx", "translatdi_v1.docx"); unchanged segments then reuse those translations
+    previous_source = None
+    previous_output = None
 
     if os.path.exists(input_file):
-        if translator.process_document(input_file, output_file):
+        if translator.process_document(input_file, output_file, previous_source, previous_output):
             print("Document translated successfully")
         else:
             print("Translation failed")
@@ -1,35 +1,55 @@
 import docx
 from docx.shared import Pt
-from openai import OpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 import os
-def translate_text_gpt4(content, llm):
+from translation_memory import TranslationMemory
+from async_engine import AsyncTranslationEngine
+from skiplist import SkipFilter
+from glossary import PLACEHOLDER_INSTRUCTIONS, load_glossary
+
+SYSTEM_PROMPT = "You are a professional Hindi translator. You are Finance Expert. You'll not translate Financial Terms and keep them as it is. Translate the following text into Hindi while retaining the meaning, context, and tone." + PLACEHOLDER_INSTRUCTIONS
+
+def translate_body_texts(doc, llm, memory, max_concurrency=8, pack_tokens=None):
     """
-    Translate English text to Hindi using GPT-4 via LangChain.
+    Translate every distinct paragraph and cell text of the body concurrently,
+    returning a source -> translation mapping.
     """
-    messages = [
-        SystemMessage(content="You are a professional Hindi translator. You are Finance Expert. You'll not translate Financial Terms and keep them as it is. Translate the following text into Hindi while retaining the meaning, context, and tone."),
-        HumanMessage(content=content)
-    ]
-    response = llm(messages)
-    return response.content.strip()
-def process_docx(input_file, output_file, llm):
+    texts = []
+    for element in doc.element.body:
+        if element.tag.endswith('p'):
+            texts.append(docx.text.paragraph.Paragraph(element, doc).text)
+        elif element.tag.endswith('tbl'):
+            table = docx.table.Table(element, doc)
+            texts.extend(cell.text for row in table.rows for cell in row.cells)
+    unique = list(dict.fromkeys(text for text in texts if text.strip()))
+    engine = AsyncTranslationEngine(
+        llm, SYSTEM_PROMPT, max_concurrency=max_concurrency, memory=memory, pack_tokens=pack_tokens
+    )
+    # Numbers, codes, dates and text already in Hindi pass through untranslated
+    # and glossary terms are masked with placeholders, restored after translation
+    skip = SkipFilter()
+    glossary = load_glossary()
+    translations = dict(zip(unique, skip.wrap(glossary.wrap(engine.translate_batch))(unique)))
+    print(skip.report())
+    print(glossary.report())
+    return translations
+def process_docx(input_file, output_file, llm, max_concurrency=8, pack_tokens=None):
     """
     Process input docx file:
     1. Translate text.
     2. Preserve images in position.
     3. Export a new translated docx file.
     """
+    memory = TranslationMemory(backend="langchain-openai", model=getattr(llm, "model_name", ""), prompt=SYSTEM_PROMPT)
     # Load the document
     doc = docx.Document(input_file)
+    translations = translate_body_texts(doc, llm, memory, max_concurrency, pack_tokens)
     # Create a new document to save the translated content
     translated_doc = docx.Document()
     for element in doc.element.body:
         if element.tag.endswith('p'):  # Paragraphs
             para = docx.text.paragraph.Paragraph(element, doc)
             if para.text.strip():  # Translate only non-empty text
-                translated_text = translate_text_gpt4(para.text, llm)
+                translated_text = translations[para.text]
                 new_para = translated_doc.add_paragraph(translated_text)
                 # Copy formatting (font size, etc.)
                 for run, new_run in zip(para.runs, new_para.runs):
@@ -40,16 +60,17 @@ def process_docx(input_file, output_file, llm):
             for row in table.rows:
                 new_row = new_table.add_row()
                 for i, cell in enumerate(row.cells):
-                    translated_text = translate_text_gpt4(cell.text, llm)
+                    translated_text = translations.get(cell.text, cell.text)
                     new_row.cells[i].text = translated_text
         elif element.tag.endswith('drawing'):  # Images
             # Preserve images in the same position
             translated_doc.element.body.append(element)
     # Save the translated document
     translated_doc.save(output_file)
+    print(memory.report())
     print(f"Translated document saved to: {output_file}")
 if __name__ == "__main__":
-    import os
+    from langchain_openai import ChatOpenAI
     os.environ["OPENAI_API_KEY"] = "your open ai key"  # Set your OpenAI API key
     # Initialize the language model
     llm = ChatOpenAI(model="gpt-4o", temperature=0)
@@ -1,50 +1,60 @@
+import re
 from googletrans import Translator
-from docx import Document
-from jina import Client
-import time
-import os
-from typing import Optional
+from translation_memory import TranslationMemory
+from glossary import load_glossary
+from resilience import RETRYABLE_STATUSES, Resilient, RetryableError, RetryPolicy
+from backends import GoogleBackend
+from pipeline import summary_line, translate_document
+
+# googletrans raises a bare Exception with the HTTP status only in its message
+GOOGLETRANS_STATUS = re.compile(r'Unexpected status code "(\d+)"')
 
 class DocumentTranslator:
     def __init__(self):
-        self.translator = Translator()
-        self.max_retries = 3
-        self.retry_delay = 2
+        # Raise on a 429 or 5xx instead of handing back the source text as its translation
+        self.translator = Translator(raise_exception=True)
+        self.resilience = Resilient("googletrans", RetryPolicy(max_attempts=3, base_delay=1))
+        self.memory = TranslationMemory(backend="googletrans")
 
     def translate_text(self, text: str, dest='hi') -> str:
         if not text.strip():
             return text
 
-        for attempt in range(self.max_retries):
-            try:
-                result = self.translator.translate(text, dest=dest)
-                return result.text
-            except Exception as e:
-                print(f"Translation attempt {attempt + 1} failed: {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay)
-        return text
+        cached = self.memory.get(text, target_lang=dest)
+        if cached is not None:
+            return cached
 
-    def process_document(self, input_path: str, output_path: str) -> bool:
         try:
-            # Load document
-            doc = Document(input_path)
-            
-            # Process tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            cell.text = self.translate_text(cell.text)
+            result = self.resilience.call(lambda: self._translate(text, dest))
+        except Exception as e:
+            print(f"Translation failed: {e}")
+            return text
+        # An untranslated echo of the source is not worth remembering (as in TranslationJournal.record)
+        if result.text.strip() != text.strip():
+            self.memory.put(text, result.text, target_lang=dest)
+        return result.text
 
-            # Process paragraphs (skip images)
-            for para in doc.paragraphs:
-                if para.text.strip() and not para._element.xpath('.//w:drawing'):
-                    translated_text = self.translate_text(para.text)
-                    para.text = translated_text
+    def _translate(self, text: str, dest: str):
+        try:
+            return self.translator.translate(text, dest=dest)
+        except Exception as e:
+            match = GOOGLETRANS_STATUS.search(str(e))
+            if match:
+                status = int(match.group(1))
+                if status in RETRYABLE_STATUSES or status >= 500:
+                    raise RetryableError(status, message=str(e)) from e
+            raise
 
-            # Save using Jina format
-            doc.save(output_path)
+    def process_document(self, input_path: str, output_path: str) -> bool:
+        try:
+            # Every story of the document, each distinct text translated once
+            glossary = load_glossary()
+            summary = translate_document(input_path, output_path, GoogleBackend(translator=self),
+                                         all_stories=True, glossary=glossary)
+            print(summary_line(summary))
+            print(glossary.report())
+            print(self.memory.report())
+            print(self.resilience.report())
             print(f"Translation complete: {output_path}")
             return True
 
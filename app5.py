@@ -1,57 +1,148 @@
-from transformers import MarianMTModel, MarianTokenizer
-from docx import Document
-import torch
 from tqdm import tqdm
 import os
+from typing import List, Optional, Tuple
+from translation_memory import TranslationMemory
+from glossary import load_glossary
+from backends import MarianBackend
+from pipeline import summary_line, translate_document
+from batching import length_bucketed_batches, run_isolating_failures
+from cpu_inference import configure_threads, decoding_key, quantize_dynamic, sequence_confidences
 
 class LocalTranslator:
-    def __init__(self):
-        print("Loading translation model... (first time may take a few minutes)")
+    def __init__(self, batch_size: int = 16, max_chars: int = 400, quantize: bool = False,
+                 num_beams: Optional[int] = None, threads: Optional[int] = None):
         self.model_name = 'Helsinki-NLP/opus-mt-en-hi'
-        self.tokenizer = MarianTokenizer.from_pretrained(self.model_name)
-        self.model = MarianMTModel.from_pretrained(self.model_name)
-        if torch.cuda.is_available():
-            self.model = self.model.to('cuda')
+        self.batch_size = batch_size
+        self.max_chars = max_chars
+        # CPU inference options: int8 Linear layers, decoding beam width (None
+        # keeps the model's default, 1 is greedy) and torch intra-op threads
+        self.quantize = quantize
+        self.num_beams = num_beams
+        self.threads = threads
+        self.memory = TranslationMemory(
+            backend="marianmt", model=decoding_key(self.model_name, quantize, num_beams, None)
+        )
+        self._model = None
+        self._tokenizer = None
+        self.device = None
+
+    def load_model(self):
+        # torch and transformers are only imported once a segment misses the
+        # translation memory, so startup and fully cached documents skip them
+        if self._model is not None:
+            return
+        import torch
+        from transformers import MarianMTModel, MarianTokenizer
+        print("Loading translation model... (first time may take a few minutes)")
+        self._tokenizer = MarianTokenizer.from_pretrained(self.model_name)
+        model = MarianMTModel.from_pretrained(self.model_name)
+        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        model = model.to(self.device)
+        model.eval()
+        if self.device == 'cpu':
+            if self.threads:
+                configure_threads(self.threads)
+            if self.quantize:
+                model = quantize_dynamic(model)
+        self._model = model
         print("Model loaded successfully!")
+
+    @property
+    def model(self):
+        self.load_model()
+        return self._model
+
+    @property
+    def tokenizer(self):
+        self.load_model()
+        return self._tokenizer
         
     def translate_text(self, text: str) -> str:
         if not text.strip():
             return text
-            
-        try:
-            inputs = self.tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
-            if torch.cuda.is_available():
-                inputs = {k: v.to('cuda') for k, v in inputs.items()}
-            translated = self.model.generate(**inputs)
-            result = self.tokenizer.decode(translated[0], skip_special_tokens=True)
-            return result
-        except Exception as e:
-            print(f"Translation error: {e}")
-            return text
+        return self.translate_batch([text])[0]
 
-    def process_document(self, input_path: str, output_path: str) -> bool:
-        try:
-            doc = Document(input_path)
-            
-            # Count total items for progress bar
-            total_items = len(doc.paragraphs) + sum(len(table.rows) * len(table.columns) for table in doc.tables)
-            
-            with tqdm(total=total_items, desc="Translating") as pbar:
-                # Process tables
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            if cell.text.strip():
-                                cell.text = self.translate_text(cell.text)
-                            pbar.update(1)
+    def translate_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[str]:
+        # Serve repeats from the translation memory and only run the model on misses
+        results = [text if not text.strip() else self.memory.get(text) for text in texts]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            translations = self.generate_batch([texts[i] for i in missing], batch_size)
+            for i, translation in zip(missing, translations):
+                results[i] = translation
+        return results
+
+    def generate_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[str]:
+        """
+        Run the model over texts in length-sorted buckets so each forward pass
+        pads only to similarly sized inputs; results come back in input order.
+        """
+        batch_size = batch_size or self.batch_size
+        lengths = [len(ids) for ids in self.tokenizer(texts, truncation=True, max_length=512)["input_ids"]]
+        results = list(texts)
+        with tqdm(total=len(texts), desc="Translating", unit="seg", leave=False) as pbar:
+            for bucket in length_bucketed_batches(lengths, batch_size):
+                translations = run_isolating_failures([texts[i] for i in bucket], self._generate, lambda text: text)
+                for i, translation in zip(bucket, translations):
+                    results[i] = translation
+                pbar.update(len(bucket))
+        return results
 
-                # Process paragraphs
-                for para in doc.paragraphs:
-                    if para.text.strip() and not para._element.xpath('.//w:drawing'):
-                        para.text = self.translate_text(para.text)
-                    pbar.update(1)
+    def translate_scored(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """
+        (translation, confidence) for each text, where confidence is the
+        model's exp(mean token log-probability). Translation memory hits keep
+        the confidence stored with them, so only misses run the model; entries
+        stored unscored (by translate_batch) are rescored like misses, which
+        also stores their confidence.
+        """
+        results = [None] * len(texts)
+        for i, text in enumerate(texts):
+            entry = self.memory.get_scored(text)
+            if entry is not None and entry[1] is not None:
+                results[i] = entry
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+        pending = [texts[i] for i in missing]
+        lengths = [len(ids) for ids in self.tokenizer(pending, truncation=True, max_length=512)["input_ids"]]
+        for bucket in length_bucketed_batches(lengths, self.batch_size):
+            scored = run_isolating_failures(
+                [pending[j] for j in bucket], lambda batch: self._generate(batch, scored=True), lambda text: (text, 0.0)
+            )
+            for j, result in zip(bucket, scored):
+                results[missing[j]] = result
+        return results
 
-            doc.save(output_path)
+    def _generate(self, batch: List[str], scored: bool = False) -> list:
+        import torch
+        inputs = self.tokenizer(batch, return_tensors="pt", padding=True, truncation=True, max_length=512)
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        with torch.inference_mode():
+            if self.num_beams is not None:
+                translated = self.model.generate(**inputs, num_beams=self.num_beams)
+            else:
+                translated = self.model.generate(**inputs)
+        decoded = self.tokenizer.batch_decode(translated, skip_special_tokens=True)
+        confidences = [None] * len(batch)
+        if scored:
+            confidences = sequence_confidences(self.model, inputs, translated, self.tokenizer.pad_token_id)
+        for source, result, confidence in zip(batch, decoded, confidences):
+            self.memory.put(source, result, confidence=confidence)
+        if scored:
+            return list(zip(decoded, confidences))
+        return decoded
+
+    def process_document(self, input_path: str, output_path: str) -> bool:
+        try:
+            # Each distinct text translated once, sentence by sentence so nothing
+            # is cut off at the model's max_length
+            glossary = load_glossary()
+            backend = MarianBackend(translator=self, max_chars=self.max_chars)
+            summary = translate_document(input_path, output_path, backend, all_stories=True, glossary=glossary)
+            print(summary_line(summary))
+            print(glossary.report())
+            print(self.memory.report())
             return True
         except Exception as e:
             print(f"Document processing error: {e}")
@@ -1,20 +1,31 @@
 from englisttohindi.englisttohindi import EngtoHindi
-from docx import Document
 import os
+from translation_memory import TranslationMemory
+from glossary import load_glossary
+from backends import EngtoHindiBackend
+from pipeline import summary_line, translate_document
 
 class LocalTranslator:
     def __init__(self):
         # Initialize without message
         self.translators = {}
+        self.memory = TranslationMemory(backend="englisttohindi")
         
     def translate_text(self, text: str) -> str:
         if not text.strip():
             return text
-            
+
+        cached = self.memory.get(text)
+        if cached is not None:
+            return cached
+
         try:
             # Create new translator instance for each text
             translator = EngtoHindi(text)
-            return translator.convert
+            result = translator.convert
+            if result:
+                self.memory.put(text, result)
+            return result
         except Exception as e:
             print(f"Translation error: {e}")
             return text
@@ -25,23 +36,13 @@ class DocumentTranslator:
 
     def process_document(self, input_path: str, output_path: str) -> bool:
         try:
-            doc = Document(input_path)
-            
-            # Process tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            translated = self.translator.translate_text(cell.text)
-                            cell.text = translated if translated else cell.text
-
-            # Process paragraphs (skip images)
-            for para in doc.paragraphs:
-                if para.text.strip() and not para._element.xpath('.//w:drawing'):
-                    translated = self.translator.translate_text(para.text)
-                    para.text = translated if translated else para.text
-
-            doc.save(output_path)
+            # Every story of the document, each distinct text translated once
+            glossary = load_glossary()
+            summary = translate_document(input_path, output_path, EngtoHindiBackend(translator=self.translator),
+                                         all_stories=True, glossary=glossary)
+            print(summary_line(summary))
+            print(glossary.report())
+            print(self.translator.memory.report())
             print(f"Document saved to: {output_path}")
             return True
         except Exception as e:
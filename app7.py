@@ -1,31 +1,49 @@
 import requests
-import json
-from docx import Document
 import os
-from typing import Optional
-import time
+from typing import List, Optional
+from tqdm import tqdm
+from translation_memory import TranslationMemory
+from glossary import load_glossary
+from backends import OTranslatorBackend
+from pipeline import summary_line, translate_document
+from resilience import Deadline, Resilient, check_response
+from batching import capped_batches
+
+# Texts and characters submitted per task
+MAX_TASK_TEXTS = 100
+MAX_TASK_CHARS = 20000
+# Task statuses after which polling cannot change the result
+FAILED_STATUSES = {"failed", "error", "cancelled", "canceled"}
+COMPLETED_STATUSES = {"completed", "finished", "done", "success"}
 
 class OTranslator:
-    def __init__(self):
+    def __init__(self, base_url: str = 'https://otranslator.com/api/v1/translation'):
         self.api_key = ""
-        self.base_url = 'https://otranslator.com/api/v1/translation'
+        self.base_url = base_url
         self.headers = {
             'Authorization': self.api_key,
             'Content-Type': 'application/json'
         }
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.memory = TranslationMemory(backend="otranslator")
+        self.resilience = Resilient("otranslator")
+        self.timeout = 30
+        # How long to keep polling outstanding tasks before giving up on them
+        self.poll_timeout = 120
 
-    def create_translation_task(self, text: str) -> Optional[str]:
+    def create_translation_task(self, texts: List[str]) -> Optional[str]:
         try:
             data = {
-                'texts': [text],
+                'texts': texts,
                 'sourceLang': 'en',
                 'targetLang': 'hi'
             }
-            response = requests.post(
+            response = self.resilience.call(lambda: check_response(self.session.post(
                 f'{self.base_url}/create',
-                headers=self.headers,
-                json=data
-            )
+                json=data,
+                timeout=self.timeout
+            )))
             if response.status_code == 200:
                 return response.json().get('taskId')
             return None
@@ -33,38 +51,84 @@ class OTranslator:
             print(f"Task creation error: {e}")
             return None
 
-    def query_translation(self, task_id: str) -> Optional[str]:
-        try:
-            data = {'taskId': task_id}
-            response = requests.post(
-                f'{self.base_url}/queryTexts',
-                headers=self.headers,
-                json=data
-            )
-            if response.status_code == 200:
-                translations = response.json().get('translations', {})
-                return next(iter(translations.values()), None)
-            return None
-        except Exception as e:
-            print(f"Query error: {e}")
+    def query_translation(self, task_id: str, texts: List[str]) -> Optional[List[Optional[str]]]:
+        """
+        Return the task's translations in the order of texts, or None while it
+        is still running. A task that completed without some texts returns None
+        in their place; a failed or unknown task raises.
+        """
+        data = {'taskId': task_id}
+        response = self.resilience.call(lambda: check_response(self.session.post(
+            f'{self.base_url}/queryTexts',
+            json=data,
+            timeout=self.timeout
+        )))
+        if response.status_code != 200:
+            raise RuntimeError(f"task {task_id}: HTTP {response.status_code}")
+        body = response.json()
+        status = str(body.get('status') or '').lower()
+        if status in FAILED_STATUSES:
+            raise RuntimeError(f"task {task_id} {status}")
+        translations = body.get('translations') or {}
+        if len(translations) < len(texts):
+            if status in COMPLETED_STATUSES:
+                return [translations.get(text) or translations.get(str(i)) for i, text in enumerate(texts)]
             return None
+        # Results are keyed by source text or by position
+        values = list(translations.values())
+        return [translations.get(text) or translations.get(str(i)) or values[i] for i, text in enumerate(texts)]
 
-    def translate_text(self, text: str) -> str:
-        if not text.strip():
-            return text
+    def translate_batch(self, texts: List[str], progress: bool = False) -> List[str]:
+        """
+        Submit the distinct uncached texts as a few bulk tasks, then poll all
+        outstanding tasks together, quickly at first and backing off, and
+        resolve each task's segments as soon as it completes. A failed task is
+        dropped on the poll that reports it; its segments, those a completed
+        task left out and those of tasks outliving poll_timeout stay in English.
+        """
+        results = [self.memory.get(text) if text.strip() else text for text in texts]
+        missing = list(dict.fromkeys(text for text, result in zip(texts, results) if result is None))
+        translated = {}
+        outstanding = {}
+        for batch in capped_batches([len(text) for text in missing], MAX_TASK_CHARS, MAX_TASK_TEXTS):
+            batch = [missing[i] for i in batch]
+            task_id = self.create_translation_task(batch)
+            if task_id:
+                outstanding[task_id] = batch
 
-        task_id = self.create_translation_task(text)
-        if not task_id:
-            return text
+        deadline = Deadline(self.poll_timeout)
+        interval = 0.25
+        with tqdm(total=len(missing), desc="Translating", disable=not progress) as pbar:
+            while outstanding and not deadline.expired:
+                self.resilience.wait(deadline.cap(interval))
+                for task_id, batch in list(outstanding.items()):
+                    try:
+                        result = self.query_translation(task_id, batch)
+                    except Exception as e:
+                        print(f"Query error: {e}")
+                        del outstanding[task_id]
+                        continue
+                    if result is None:
+                        continue
+                    del outstanding[task_id]
+                    dropped = 0
+                    for text, translation in zip(batch, result):
+                        if translation is None:
+                            dropped += 1
+                            continue
+                        translated[text] = translation
+                        self.memory.put(text, translation)
+                    if dropped:
+                        print(f"Task {task_id} completed without {dropped} of {len(batch)} texts")
+                    pbar.update(len(batch))
+                interval = min(5.0, interval * 1.5)
+        if outstanding:
+            print(f"{len(outstanding)} tasks did not finish within {self.poll_timeout}s")
+        return [result if result is not None else translated.get(text, text)
+                for text, result in zip(texts, results)]
 
-        # Wait for translation to complete
-        for _ in range(3):
-            time.sleep(2)
-            result = self.query_translation(task_id)
-            if result:
-                return result
-        
-        return text
+    def translate_text(self, text: str) -> str:
+        return self.translate_batch([text])[0]
 
 class DocumentTranslator:
     def __init__(self):
@@ -72,21 +136,14 @@ class DocumentTranslator:
 
     def process_document(self, input_path: str, output_path: str) -> bool:
         try:
-            doc = Document(input_path)
-            
-            # Process tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            cell.text = self.translator.translate_text(cell.text)
-
-            # Process paragraphs (skip images)
-            for para in doc.paragraphs:
-                if para.text.strip() and not para._element.xpath('.//w:drawing'):
-                    para.text = self.translator.translate_text(para.text)
-
-            doc.save(output_path)
+            # Every story of the document, each distinct text translated once
+            glossary = load_glossary()
+            backend = OTranslatorBackend(translator=self.translator, progress=True)
+            summary = translate_document(input_path, output_path, backend, all_stories=True, glossary=glossary)
+            print(summary_line(summary))
+            print(glossary.report())
+            print(self.translator.memory.report())
+            print(self.translator.resilience.report())
             return True
         except Exception as e:
             print(f"Document processing error: {e}")
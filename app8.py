@@ -1,45 +1,90 @@
 import requests
-from docx import Document
+from requests.adapters import HTTPAdapter
 import os
-import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List
 from tqdm import tqdm
+from translation_memory import TranslationMemory
+from glossary import load_glossary
+from backends import AzureBackend
+from pipeline import summary_line, translate_document
+from resilience import Resilient, check_response
+from batching import capped_batches
+
+# Translator v3 limits for one request
+MAX_ELEMENTS = 100
+MAX_CHARS = 50000
 
 class AzureTranslator:
-    def __init__(self):
-        self.endpoint = "http://localhost:5000"
+    def __init__(self, endpoint: str = "http://localhost:5000", max_workers: int = 4):
+        self.endpoint = endpoint
         self.headers = {
             "Content-Type": "application/json",
             "Accept": "application/json"
         }
-        self.check_container()
+        self.max_workers = max_workers
+        # One keep-alive connection per concurrent request instead of a new connection per segment
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.memory = TranslationMemory(backend="azure-container")
+        self.resilience = Resilient("azure-container")
+        self.timeout = 30
+        # The health check runs before the first real request, not at construction
+        self.checked = False
     
     def check_container(self):
+        self.checked = True
         try:
-            response = requests.get(f"{self.endpoint}/")
+            response = self.session.get(f"{self.endpoint}/", timeout=self.timeout)
             if response.status_code != 200:
                 print("Warning: Translation container not responding")
                 print("Run: docker run --name translator -d -p 5000:5000 mcr.microsoft.com/azure-cognitive-services/translator")
         except:
             print("Error: Container not running")
             
+    def _request(self, texts: List[str]) -> List[str]:
+        payload = [{"Text": text} for text in texts]
+        response = self.resilience.call(lambda: check_response(self.session.post(
+            f"{self.endpoint}/translate?api-version=3.0&from=en&to=hi",
+            json=payload,
+            timeout=self.timeout
+        )))
+        response.raise_for_status()
+        return [item["translations"][0]["text"] for item in response.json()]
+
+    def translate_batch(self, texts: List[str], progress: bool = False) -> List[str]:
+        """
+        Translate texts as arrays of up to MAX_ELEMENTS elements / MAX_CHARS
+        characters, sending up to max_workers requests at once over the
+        pooled session. Segments of a failed request stay in English.
+        """
+        results = [self.memory.get(text) if text.strip() else text for text in texts]
+        missing = list(dict.fromkeys(text for text, result in zip(texts, results) if result is None))
+        translated = {}
+        if missing and not self.checked:
+            self.check_container()
+        batches = [[missing[i] for i in batch]
+                   for batch in capped_batches([len(text) for text in missing], MAX_CHARS, MAX_ELEMENTS)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool, \
+                tqdm(total=len(missing), desc="Translating", disable=not progress) as pbar:
+            futures = {pool.submit(self._request, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    for text, result in zip(batch, future.result()):
+                        translated[text] = result
+                        self.memory.put(text, result)
+                except Exception as e:
+                    print(f"Translation error: {e}")
+                pbar.update(len(batch))
+        return [result if result is not None else translated.get(text, text)
+                for text, result in zip(texts, results)]
+
     def translate_text(self, text: str) -> str:
-        if not text.strip():
-            return text
-            
-        try:
-            payload = [{"Text": text}]
-            response = requests.post(
-                f"{self.endpoint}/translate?api-version=3.0&from=en&to=hi",
-                headers=self.headers,
-                json=payload
-            )
-            if response.status_code == 200:
-                return response.json()[0]["translations"][0]["text"]
-            return text
-        except Exception as e:
-            print(f"Translation error: {e}")
-            return text
+        return self.translate_batch([text])[0]
 
 class DocumentProcessor:
     def __init__(self):
@@ -47,25 +92,14 @@ class DocumentProcessor:
 
     def process_document(self, input_path: str, output_path: str) -> bool:
         try:
-            doc = Document(input_path)
-            total_items = len(doc.paragraphs) + sum(len(table.rows) * len(table.columns) for table in doc.tables)
-            
-            with tqdm(total=total_items, desc="Translating") as pbar:
-                # Process tables
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            if cell.text.strip():
-                                cell.text = self.translator.translate_text(cell.text)
-                                pbar.update(1)
-
-                # Process paragraphs (skip images)
-                for para in doc.paragraphs:
-                    if para.text.strip() and not para._element.xpath('.//w:drawing'):
-                        para.text = self.translator.translate_text(para.text)
-                    pbar.update(1)
-
-            doc.save(output_path)
+            # Every story of the document, each distinct text translated once
+            glossary = load_glossary()
+            backend = AzureBackend(translator=self.translator, progress=True)
+            summary = translate_document(input_path, output_path, backend, all_stories=True, glossary=glossary)
+            print(summary_line(summary))
+            print(glossary.report())
+            print(self.translator.memory.report())
+            print(self.translator.resilience.report())
             return True
         except Exception as e:
             print(f"Document processing error: {e}")
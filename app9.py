@@ -1,98 +1,185 @@
-import torch
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
-from IndicTransTokenizer import IndicProcessor
-from docx import Document
 from tqdm import tqdm
 import os
+from typing import Optional
+from translation_memory import TranslationMemory
+from glossary import load_glossary
+from backends import IndicTrans2Backend
+from pipeline import summary_line, translate_document
+from batching import run_isolating_failures, token_budget_batches
+from cpu_inference import configure_threads, decoding_key, quantize_dynamic, sequence_confidences
 
 class IndicTranslator:
-    def __init__(self):
-        print("Loading AI4Bharat IndicTrans2 model... (this may take a few minutes)")
+    def __init__(self, max_batch_tokens: int = 4096, max_batch_size: int = 64, num_beams: int = 5,
+                 max_chars: int = 400, quantize: bool = False, threads: Optional[int] = None):
         self.model_name = "ai4bharat/indictrans2-en-indic-dist-200M"
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name, trust_remote_code=True)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name, trust_remote_code=True)
-        self.ip = IndicProcessor(inference=True)
+        self._model = None
+        self._tokenizer = None
+        self._ip = None
+        self.device = None
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.num_beams = num_beams
+        self.max_chars = max_chars
+        # CPU inference options: int8 Linear layers and torch intra-op threads
+        self.quantize = quantize
+        self.threads = threads
+        self.memory = TranslationMemory(
+            backend="indictrans2", model=decoding_key(self.model_name, quantize, num_beams, 5), target_lang="hin_Deva"
+        )
+
+    def load_model(self):
+        # Deferred until a segment misses the translation memory
+        if self._model is not None:
+            return
+        import torch
+        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+        from IndicTransTokenizer import IndicProcessor
+        print("Loading AI4Bharat IndicTrans2 model... (this may take a few minutes)")
+        self._tokenizer = AutoTokenizer.from_pretrained(self.model_name, trust_remote_code=True)
+        model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name, trust_remote_code=True)
+        self._ip = IndicProcessor(inference=True)
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model.to(self.device)
-        print(f"Model loaded successfully on {self.device}!")
+        model = model.to(self.device)
+        if self.device == "cpu":
+            if self.threads:
+                configure_threads(self.threads)
+            if self.quantize:
+                model = quantize_dynamic(model)
+        self._model = model
+        print(f"Model loaded successfully on {self.device}{' (int8)' if self.quantize and self.device == 'cpu' else ''}!")
+
+    @property
+    def model(self):
+        self.load_model()
+        return self._model
+
+    @property
+    def tokenizer(self):
+        self.load_model()
+        return self._tokenizer
+
+    @property
+    def ip(self):
+        self.load_model()
+        return self._ip
 
     def translate_batch(self, texts):
         if not texts:
             return []
-            
-        try:
-            batch = self.ip.preprocess_batch(texts, src_lang="eng_Latn", tgt_lang="hin_Deva")
-            
-            inputs = self.tokenizer(
-                batch,
-                truncation=True,
-                padding="longest",
-                return_tensors="pt",
-                return_attention_mask=True
-            ).to(self.device)
-
-            with torch.no_grad():
-                generated_tokens = self.model.generate(
-                    **inputs,
-                    use_cache=True,
-                    min_length=0,
-                    max_length=256,
-                    num_beams=5,
-                    num_return_sequences=1
-                )
 
-            with self.tokenizer.as_target_tokenizer():
-                generated_tokens = self.tokenizer.batch_decode(
-                    generated_tokens.detach().cpu().tolist(),
-                    skip_special_tokens=True,
-                    clean_up_tokenization_spaces=True
+        # Serve repeats from the translation memory and only run the model on misses
+        results = [self.memory.get(text) for text in texts]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            translations = self._generate([texts[i] for i in missing])
+            for i, translation in zip(missing, translations):
+                results[i] = translation
+        return results
+
+    def _token_lengths(self, texts):
+        # Input lengths as the model sees them, language tags included
+        batch = self.ip.preprocess_batch(texts, src_lang="eng_Latn", tgt_lang="hin_Deva")
+        return [len(ids) for ids in self.tokenizer(batch, truncation=True)["input_ids"]]
+
+    def _generate(self, texts):
+        # Length-sorted batches bounded by a padded-token budget; a failing batch
+        # is bisected so only the smallest failing sub-batch stays in English
+        results = list(texts)
+        batches = token_budget_batches(self._token_lengths(texts), self.max_batch_tokens, self.max_batch_size)
+        with tqdm(total=len(texts), desc="Translating", unit="seg", leave=False) as pbar:
+            for indices in batches:
+                translations = run_isolating_failures(
+                    [texts[i] for i in indices], self._generate_batch, lambda text: text
                 )
+                for i, translation in zip(indices, translations):
+                    results[i] = translation
+                pbar.update(len(indices))
+        return results
 
-            translations = self.ip.postprocess_batch(generated_tokens, lang="hin_Deva")
-            return translations
-        except Exception as e:
-            print(f"Translation error: {e}")
-            return texts
+    def translate_scored(self, texts):
+        """
+        (translation, confidence) for each text, where confidence is the
+        model's exp(mean token log-probability). Translation memory hits keep
+        the confidence stored with them, so only misses run the model; entries
+        stored unscored (by translate_batch) are rescored like misses, which
+        also stores their confidence.
+        """
+        results = [None] * len(texts)
+        for i, text in enumerate(texts):
+            entry = self.memory.get_scored(text)
+            if entry is not None and entry[1] is not None:
+                results[i] = entry
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+        pending = [texts[i] for i in missing]
+        batches = token_budget_batches(self._token_lengths(pending), self.max_batch_tokens, self.max_batch_size)
+        for indices in batches:
+            scored = run_isolating_failures(
+                [pending[j] for j in indices], lambda batch: self._generate_batch(batch, scored=True),
+                lambda text: (text, 0.0)
+            )
+            for j, result in zip(indices, scored):
+                results[missing[j]] = result
+        return results
+
+    def _generate_batch(self, texts, scored=False):
+        import torch
+        batch = self.ip.preprocess_batch(texts, src_lang="eng_Latn", tgt_lang="hin_Deva")
+
+        inputs = self.tokenizer(
+            batch,
+            truncation=True,
+            padding="longest",
+            return_tensors="pt",
+            return_attention_mask=True
+        ).to(self.device)
+
+        with torch.inference_mode():
+            sequences = self.model.generate(
+                **inputs,
+                use_cache=True,
+                min_length=0,
+                max_length=256,
+                num_beams=self.num_beams,
+                num_return_sequences=1
+            )
+
+        with self.tokenizer.as_target_tokenizer():
+            generated_tokens = self.tokenizer.batch_decode(
+                sequences.detach().cpu().tolist(),
+                skip_special_tokens=True,
+                clean_up_tokenization_spaces=True
+            )
+
+        translations = self.ip.postprocess_batch(generated_tokens, lang="hin_Deva")
+        confidences = [None] * len(texts)
+        if scored:
+            confidences = sequence_confidences(self.model, dict(inputs), sequences, self.tokenizer.pad_token_id)
+        for text, translation, confidence in zip(texts, translations, confidences):
+            self.memory.put(text, translation, confidence=confidence)
+        if scored:
+            return list(zip(translations, confidences))
+        return translations
 
     def process_document(self, input_path: str, output_path: str) -> bool:
         try:
-            doc = Document(input_path)
-            
-            # Count total items for progress bar
-            total_items = len(doc.paragraphs) + sum(len(table.rows) * len(table.columns) for table in doc.tables)
-            
-            with tqdm(total=total_items, desc="Translating") as pbar:
-                # Process tables
-                for table in doc.tables:
-                    texts = []
-                    cells = []
-                    for row in table.rows:
-                        for cell in row.cells:
-                            if cell.text.strip():
-                                texts.append(cell.text)
-                                cells.append(cell)
-                    
-                    if texts:
-                        translations = self.translate_batch(texts)
-                        for cell, translation in zip(cells, translations):
-                            cell.text = translation
-                            pbar.update(1)
-
-                # Process paragraphs
-                texts = []
-                paras = []
-                for para in doc.paragraphs:
-                    if para.text.strip() and not para._element.xpath('.//w:drawing'):
-                        texts.append(para.text)
-                        paras.append(para)
-                
-                if texts:
-                    translations = self.translate_batch(texts)
-                    for para, translation in zip(paras, translations):
-                        para.text = translation
-                        pbar.update(1)
-
-            doc.save(output_path)
+            # Each distinct text translated once, sentence by sentence so nothing
+            # is cut off at max_length
+            glossary = load_glossary()
+            backend = IndicTrans2Backend(translator=self, max_chars=self.max_chars)
+            summary = translate_document(input_path, output_path, backend, all_stories=True, glossary=glossary)
+            try:
+                import resource
+                # ru_maxrss is reported in kilobytes on Linux
+                peak_rss = f", peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB"
+            except ImportError:
+                # No resource module on Windows
+                peak_rss = ""
+            print(f"{summary_line(summary)} ({summary['unique'] / max(summary['seconds'], 1e-9):.2f} segments/s)"
+                  f"{peak_rss}")
+            print(glossary.report())
+            print(self.memory.report())
             return True
         except Exception as e:
             print(f"Document processing error: {e}")
@@ -0,0 +1,255 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from tqdm import tqdm
+
+from batching import estimate_tokens
+from metrics import REGISTRY
+from resilience import Deadline, Resilient, RetryPolicy
+from prompt_packing import PACKED_INSTRUCTIONS, build_payload, pack_batches, parse_response, split_ids
+
+
+class RateLimiter:
+    """Sliding one-minute window over request count and estimated tokens."""
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = deque()
+        self.tokens_in_window = 0
+        self.lock = asyncio.Lock()
+
+    def _prune(self, now: float):
+        while self.window and now - self.window[0][0] >= 60:
+            _, tokens = self.window.popleft()
+            self.tokens_in_window -= tokens
+
+    def _has_room(self, tokens: int) -> bool:
+        if self.requests_per_minute and len(self.window) >= self.requests_per_minute:
+            return False
+        # A single request larger than the whole budget is let through on an empty window
+        if self.tokens_per_minute and self.window and self.tokens_in_window + tokens > self.tokens_per_minute:
+            return False
+        return True
+
+    async def acquire(self, tokens: int):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+                if self._has_room(tokens):
+                    self.window.append((now, tokens))
+                    self.tokens_in_window += tokens
+                    return
+                await asyncio.sleep(60 - (now - self.window[0][0]))
+
+
+class AsyncTranslationEngine:
+    """
+    Translate many segments concurrently through a LangChain chat model's async
+    API, bounded by a concurrency limit and optional request/token per-minute
+    rate limits. Results are returned in input order.
+
+    With pack_tokens set, segments are packed into JSON-tagged multi-item
+    prompts of up to that many estimated tokens; items missing from a
+    response are split off and retried in smaller batches, down to a single
+    segment per request. A packed request that fails outright leaves its
+    segments untranslated instead.
+
+    Failed requests are retried with exponential backoff and jitter through
+    a Resilient wrapper (Retry-After aware, with a shared circuit breaker);
+    deadline, in seconds, bounds a whole translate_all call.
+    """
+
+    def __init__(self, llm, system_prompt: str, max_concurrency: int = 8,
+                 requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None,
+                 memory=None, max_retries: int = 3, retry_delay: float = 2,
+                 pack_tokens: Optional[int] = None, pack_items: int = 50,
+                 resilience: Optional[Resilient] = None, deadline: Optional[float] = None):
+        self.llm = llm
+        self.system_prompt = system_prompt
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.memory = memory
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.pack_tokens = pack_tokens
+        self.pack_items = pack_items
+        self.resilience = resilience or Resilient(
+            "langchain-openai", RetryPolicy(max_attempts=max_retries, base_delay=retry_delay)
+        )
+        self.deadline = deadline
+        self.system_tokens = estimate_tokens(system_prompt)
+        self.packed_system_prompt = system_prompt + PACKED_INSTRUCTIONS
+        self.packed_system_tokens = estimate_tokens(self.packed_system_prompt)
+        self.requests = 0
+        self._on_result = None
+
+    async def _call_llm(self, messages) -> str:
+        if hasattr(self.llm, "ainvoke"):
+            response = await self.llm.ainvoke(messages)
+            return response.content
+        result = await self.llm.agenerate([messages])
+        return result.generations[0][0].message.content
+
+    async def _request(self, messages, tokens: int) -> Optional[str]:
+        queued = time.perf_counter()
+
+        async def attempt():
+            nonlocal queued
+            await self._limiter.acquire(tokens)
+            started = time.perf_counter()
+            # Time blocked on the concurrency limit and rate limiter vs. time in the API call
+            REGISTRY.observe("queue_wait_seconds", started - queued, backend=self.resilience.name)
+            self.requests += 1
+            try:
+                return (await self._call_llm(messages)).strip()
+            finally:
+                queued = time.perf_counter()
+                REGISTRY.observe("service_seconds", queued - started, backend=self.resilience.name)
+
+        async with self._semaphore:
+            try:
+                return await self.resilience.acall(attempt, self._deadline)
+            except Exception as e:
+                print(f"Translation failed: {e}")
+                return None
+
+    @staticmethod
+    def _messages(system_prompt: str, content: str) -> list:
+        # Imported on the first request so importing the engine does not load langchain
+        from langchain.schema import HumanMessage, SystemMessage
+        return [SystemMessage(content=system_prompt), HumanMessage(content=content)]
+
+    def _store(self, text: str, result: str):
+        if self.memory is not None:
+            self.memory.put(text, result)
+        if self._on_result is not None:
+            self._on_result(text, result)
+
+    async def _translate(self, text: str) -> str:
+        messages = self._messages(self.system_prompt, text)
+        # Prompt plus an allowance for the (longer) Devanagari completion
+        result = await self._request(messages, self.system_tokens + 3 * estimate_tokens(text))
+        if result is None:
+            return text
+        self._store(text, result)
+        return result
+
+    async def _translate_packed(self, items: Dict[str, str]) -> Dict[str, str]:
+        if len(items) == 1:
+            (item_id, text), = items.items()
+            return {item_id: await self._translate(text)}
+
+        payload = build_payload(items)
+        messages = self._messages(self.packed_system_prompt, payload)
+        content = await self._request(messages, self.packed_system_tokens + 3 * estimate_tokens(payload))
+        if content is None:
+            # The request itself failed after its retries; splitting it would only repeat the failure
+            return dict(items)
+        results = parse_response(content, list(items))
+        for item_id, result in results.items():
+            self._store(items[item_id], result)
+
+        # Retry whatever came back missing or misaligned in smaller batches
+        missing = [item_id for item_id in items if item_id not in results]
+        if missing:
+            halves = split_ids(missing) or [missing]
+            for partial in await asyncio.gather(*(
+                self._translate_packed({item_id: items[item_id] for item_id in half}) for half in halves
+            )):
+                results.update(partial)
+        return results
+
+    async def translate_all(self, texts: List[str],
+                            on_result: Optional[Callable[[str, str], None]] = None) -> List[str]:
+        """
+        Translate texts, returning results in input order. on_result, if
+        given, is called with (text, translation) as each segment completes.
+        """
+        self._on_result = on_result
+        results = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if not text.strip():
+                results[i] = text
+                continue
+            cached = self.memory.get(text) if self.memory is not None else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+
+        if pending:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._limiter = RateLimiter(self.requests_per_minute, self.tokens_per_minute)
+            self._deadline = Deadline(self.deadline)
+
+            async def run(i):
+                results[i] = await self._translate(texts[i])
+                pbar.update(1)
+
+            async def run_packed(batch):
+                translated = await self._translate_packed({str(n + 1): texts[i] for n, i in enumerate(batch)})
+                for n, i in enumerate(batch):
+                    results[i] = translated[str(n + 1)]
+                pbar.update(len(batch))
+
+            with tqdm(total=len(pending), desc="Translating") as pbar:
+                if self.pack_tokens:
+                    pending_texts = [texts[i] for i in pending]
+                    batches = pack_batches(
+                        pending_texts, [estimate_tokens(text) for text in pending_texts],
+                        self.pack_tokens, self.pack_items
+                    )
+                    await asyncio.gather(*(run_packed([pending[j] for j in batch]) for batch in batches))
+                else:
+                    await asyncio.gather(*(run(i) for i in pending))
+        return results
+
+    def translate_batch(self, texts: List[str],
+                        on_result: Optional[Callable[[str, str], None]] = None) -> List[str]:
+        return asyncio.run(self.translate_all(texts, on_result))
+
+
+class FakeChatModel:
+    """
+    Local stand-in for ChatOpenAI that answers after a fixed latency, for
+    exercising the engine without network access or API spend. Packed JSON
+    prompts are answered item by item; drop_every=n omits every nth item of a
+    packed reply to exercise the split-and-retry path.
+    """
+
+    class Response:
+        def __init__(self, content: str):
+            self.content = content
+
+    def __init__(self, latency: float = 0.5, prefix: str = "[hi] ", drop_every: int = 0):
+        self.latency = latency
+        self.prefix = prefix
+        self.drop_every = drop_every
+        self.calls = 0
+
+    def _reply(self, messages):
+        self.calls += 1
+        content = messages[-1].content
+        if PACKED_INSTRUCTIONS in messages[0].content:
+            items = json.loads(content)
+            reply = {}
+            for n, (item_id, text) in enumerate(items.items(), 1):
+                if not (self.drop_every and n % self.drop_every == 0):
+                    reply[item_id] = self.prefix + text
+            return self.Response(json.dumps(reply, ensure_ascii=False))
+        return self.Response(self.prefix + content)
+
+    def __call__(self, messages):
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
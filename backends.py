@@ -0,0 +1,281 @@
+import os
+import time
+from typing import Dict, List, Protocol, runtime_checkable
+
+
+@runtime_checkable
+class TranslationBackend(Protocol):
+    """
+    Interface every translator exposes to the document pipeline.
+
+    Capability flags let the pipeline pick the best strategy per backend:
+    max_batch_size bounds a single translate_batch call, sentence_level asks
+    for paragraphs to be split into sentences first, supports_async marks an
+    atranslate_batch coroutine, supports_tags marks backends that keep the
+    inline <rN> run tags of tag_runs (LLMs; MT services and local models
+    drop or translate them), and cost_per_token (USD, source + output,
+    0 for local models) feeds cost reports. job_key names the settings a
+    resume journal must match (the model and prompt for an LLM).
+    """
+
+    name: str
+    job_key: str
+    max_batch_size: int
+    supports_async: bool
+    supports_tags: bool
+    sentence_level: bool
+    cost_per_token: float
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        ...
+
+
+class BaseBackend:
+    name = "base"
+    max_batch_size = 1
+    supports_async = False
+    supports_tags = False
+    sentence_level = False
+    cost_per_token = 0.0
+
+    def __init__(self, translator=None, **options):
+        self.options = options
+        # The apps pass themselves in as an already-built translator
+        self._translator = translator
+
+    def _load(self):
+        raise NotImplementedError
+
+    @property
+    def job_key(self) -> str:
+        # What a resume journal is keyed on besides the input file
+        return self.name
+
+    @property
+    def translator(self):
+        # Clients and models are created on first use, not at construction
+        if self._translator is None:
+            self._translator = self._load()
+        return self._translator
+
+    def translate_text(self, text: str) -> str:
+        return self.translator.translate_text(text)
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        return [self.translate_text(text) if text.strip() else text for text in texts]
+
+
+class GoogleBackend(BaseBackend):
+    name = "google"
+
+    def _load(self):
+        from app4 import DocumentTranslator
+        return DocumentTranslator()
+
+
+class EngtoHindiBackend(BaseBackend):
+    name = "englisttohindi"
+
+    def _load(self):
+        from app6 import LocalTranslator
+        return LocalTranslator()
+
+    def translate_text(self, text: str) -> str:
+        return self.translator.translate_text(text) or text
+
+
+class OTranslatorBackend(BaseBackend):
+    name = "otranslator"
+    # Split into bulk tasks by the client itself
+    max_batch_size = 1000
+
+    def _load(self):
+        from app7 import OTranslator
+        options = dict(self.options)
+        options.pop("progress", None)
+        return OTranslator(**options)
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        return self.translator.translate_batch(texts, progress=self.options.get("progress", False))
+
+
+class AzureBackend(BaseBackend):
+    name = "azure"
+    # Packed into 100-element requests by the client itself
+    max_batch_size = 1000
+    # Translator pricing is per character; roughly four characters per token
+    cost_per_token = 4 * 10.0 / 1_000_000
+
+    def _load(self):
+        from app8 import AzureTranslator
+        options = dict(self.options)
+        options.pop("progress", None)
+        return AzureTranslator(**options)
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        return self.translator.translate_batch(texts, progress=self.options.get("progress", False))
+
+
+class MarianBackend(BaseBackend):
+    name = "marian"
+    max_batch_size = 64
+    sentence_level = True
+
+    def _load(self):
+        from app5 import LocalTranslator
+        return LocalTranslator(**self.options)
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        return self.translator.translate_batch(texts)
+
+
+class IndicTrans2Backend(BaseBackend):
+    name = "indictrans2"
+    max_batch_size = 64
+    sentence_level = True
+
+    def _load(self):
+        from app9 import IndicTranslator
+        return IndicTranslator(**self.options)
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        return self.translator.translate_batch(texts)
+
+
+class OpenAIBackend(BaseBackend):
+    """GPT-4o through LangChain, dispatched concurrently by the async engine."""
+
+    name = "gpt4o"
+    max_batch_size = 1000
+    supports_async = True
+    supports_tags = True
+    # gpt-4o list price, averaged over input ($2.50/M) and output ($10/M) tokens
+    cost_per_token = 6.25 / 1_000_000
+
+    def _load(self):
+        from async_engine import AsyncTranslationEngine
+        from app12 import SYSTEM_PROMPT
+        from translation_memory import TranslationMemory
+
+        options = dict(self.options)
+        llm = options.pop("llm", None)
+        model_name = options.pop("model_name", "gpt-4o")
+        if llm is None:
+            from langchain.chat_models import ChatOpenAI
+            llm = ChatOpenAI(api_key=os.environ.get("OPENAI_API_KEY"), model_name=model_name, temperature=0)
+        memory = TranslationMemory(backend="langchain-openai", model=model_name, prompt=SYSTEM_PROMPT)
+        return AsyncTranslationEngine(llm, SYSTEM_PROMPT, memory=memory, **options)
+
+    @property
+    def job_key(self) -> str:
+        from app12 import SYSTEM_PROMPT
+        return f"{self.name}|{self.options.get('model_name', 'gpt-4o')}|{SYSTEM_PROMPT}"
+
+    def translate_text(self, text: str) -> str:
+        return self.translate_batch([text])[0]
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        return self.translator.translate_batch(texts)
+
+    async def atranslate_batch(self, texts: List[str]) -> List[str]:
+        return await self.translator.translate_all(texts)
+
+
+class CascadeBackend(BaseBackend):
+    """
+    A local model (marian or indictrans2) for short, simple segments with
+    escalation to an LLM backend for long, complex or low-confidence ones
+    (see cascade.CascadeTranslator). Options: local, llm, local_options,
+    llm_options, max_words, max_sentences, min_confidence.
+    """
+
+    name = "cascade"
+    max_batch_size = 1000
+
+    def _load(self):
+        from cascade import CascadeTranslator
+
+        options = dict(self.options)
+        local = load_backend(options.pop("local", "marian"), **options.pop("local_options", {}))
+        llm = load_backend(options.pop("llm", "gpt4o"), **options.pop("llm_options", {}))
+        return CascadeTranslator(local, llm, **options)
+
+    @property
+    def supports_tags(self) -> bool:
+        # Tagged segments are always routed to the LLM
+        return BACKENDS[self.options.get("llm", "gpt4o")].supports_tags
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        return self.translator.translate_batch(texts)
+
+
+class ServerBackend(BaseBackend):
+    """
+    Segments sent to a running translation_server.py, which keeps its models
+    loaded between documents and batches concurrent clients together.
+    """
+
+    name = "server"
+    max_batch_size = 1000
+
+    def _load(self):
+        import requests
+        return requests.Session()
+
+    @property
+    def supports_tags(self) -> bool:
+        # Only known when the server-side backend is named
+        backend = BACKENDS.get(self.options.get("backend"))
+        return backend is not None and backend.supports_tags
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        url = self.options.get("url") or os.environ.get("TRANSLATION_SERVER_URL", "http://127.0.0.1:8765")
+        payload = {"texts": texts, "backend": self.options.get("backend")}
+        response = self.translator.post(f"{url}/translate", json=payload, timeout=self.options.get("timeout", 600))
+        response.raise_for_status()
+        return response.json()["translations"]
+
+
+class StubBackend(BaseBackend):
+    """
+    Offline stand-in for a remote service: answers every call after a fixed
+    latency (plus a per-character component) without touching the network.
+    """
+
+    name = "stub"
+    # Echoes its input, tags included
+    supports_tags = True
+
+    def __init__(self, name: str = "stub", latency: float = 0.2, per_char_latency: float = 0.0,
+                 max_batch_size: int = 1, prefix: str = "[hi] "):
+        super().__init__()
+        self.name = name
+        self.latency = latency
+        self.per_char_latency = per_char_latency
+        self.max_batch_size = max_batch_size
+        self.prefix = prefix
+        self.api_calls = 0
+
+    def _load(self):
+        return self
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        self.api_calls += 1
+        time.sleep(self.latency + self.per_char_latency * sum(len(text) for text in texts))
+        return [self.prefix + text if text.strip() else text for text in texts]
+
+
+BACKENDS: Dict[str, type] = {
+    backend.name: backend
+    for backend in (GoogleBackend, EngtoHindiBackend, OTranslatorBackend, AzureBackend,
+                    MarianBackend, IndicTrans2Backend, OpenAIBackend, CascadeBackend, ServerBackend, StubBackend)
+}
+
+# Backends that run a torch model in-process and compete for the same cores
+TORCH_BACKENDS = {"marian", "indictrans2", "cascade"}
+
+
+def load_backend(name: str, **options) -> TranslationBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}', choose from: {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[name](**options)
@@ -0,0 +1,72 @@
+from typing import Callable, List
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text
+    return max(1, len(text) // 4)
+
+
+def length_bucketed_batches(lengths: List[int], batch_size: int) -> List[List[int]]:
+    """
+    Sort item indices by length and cut them into batches of batch_size, so
+    each batch pads only to the longest of similarly sized items. Callers
+    scatter results back through the returned indices.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+
+def token_budget_batches(lengths: List[int], max_tokens: int, max_batch_size: int = 64) -> List[List[int]]:
+    """
+    Sort item indices by length and greedily fill batches while the padded
+    batch size (items x longest item) stays within max_tokens. An item longer
+    than the whole budget gets a batch of its own.
+    """
+    batches = []
+    current = []
+    for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        # Sorted ascending, so the newest item is always the longest
+        if current and ((len(current) + 1) * lengths[i] > max_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def capped_batches(sizes: List[int], max_size: int, max_items: int) -> List[List[int]]:
+    """
+    Group item indices, in order, into batches of at most max_items whose
+    sizes sum to at most max_size. An item larger than max_size gets a batch
+    of its own.
+    """
+    batches = []
+    current = []
+    current_size = 0
+    for i, size in enumerate(sizes):
+        if current and (current_size + size > max_size or len(current) >= max_items):
+            batches.append(current)
+            current = []
+            current_size = 0
+        current.append(i)
+        current_size += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def run_isolating_failures(items: list, run: Callable[[list], list], fallback: Callable[[object], object]) -> list:
+    """
+    Apply run to the whole batch; if it raises, bisect and retry the halves so
+    that only the smallest failing sub-batches fall back item by item.
+    """
+    try:
+        return run(items)
+    except Exception as e:
+        if len(items) == 1:
+            print(f"Translation error: {e}")
+            return [fallback(items[0])]
+        middle = len(items) // 2
+        return (run_isolating_failures(items[:middle], run, fallback)
+                + run_isolating_failures(items[middle:], run, fallback))
@@ -0,0 +1,116 @@
+import argparse
+import json
+import time
+from typing import List, Tuple
+
+from docx import Document
+
+from cpu_inference import chrf, configure_threads
+from segments import collect_segments
+from segmentation import segment_text
+
+# (label, quantize, num_beams); num_beams None keeps the backend's default
+CONFIGS = [
+    ("fp32", False, None),
+    ("fp32-greedy", False, 1),
+    ("int8", True, None),
+    ("int8-beam2", True, 2),
+    ("int8-greedy", True, 1),
+]
+
+
+def load_heldout(path: str) -> Tuple[List[str], List[str]]:
+    """Tab-separated "source<TAB>reference" lines."""
+    sources, references = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if "\t" in line:
+                source, reference = line.rstrip("\n").split("\t", 1)
+                sources.append(source)
+                references.append(reference)
+    return sources, references
+
+
+def load_sentences(input_path: str, limit: int) -> List[str]:
+    doc = Document(input_path)
+    texts = dict.fromkeys(segment.key for segment in collect_segments(doc))
+    sentences = list(dict.fromkeys(unit for text in texts for unit in segment_text(text)[0]))
+    return [sentence for sentence in sentences if sentence.strip()][:limit]
+
+
+def make_translator(backend: str, quantize: bool, num_beams):
+    # The returned generate functions skip the translation memory lookup, so every run is real inference
+    if backend == "marian":
+        from app5 import LocalTranslator
+        translator = LocalTranslator(quantize=quantize, num_beams=num_beams)
+        return translator, translator.generate_batch
+    from app9 import IndicTranslator
+    options = {"quantize": quantize}
+    if num_beams is not None:
+        options["num_beams"] = num_beams
+    translator = IndicTranslator(**options)
+    return translator, translator._generate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speed and chrF of CPU inference settings for the local models")
+    parser.add_argument("--backend", choices=["marian", "indictrans2"], default="marian")
+    parser.add_argument("--heldout", default=None,
+                        help="TSV of source and reference translations; "
+                             "without it the fp32 output serves as the reference")
+    parser.add_argument("--input", default="input.docx", help="source sentences when no held-out set is given")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads (default: all cores)")
+    parser.add_argument("--configs", default=",".join(label for label, _, _ in CONFIGS),
+                        help="comma-separated configs to compare; fp32 always runs as the baseline")
+    parser.add_argument("--json", default="cpu_inference_results.json")
+    args = parser.parse_args()
+    wanted = {"fp32"} | {label.strip() for label in args.configs.split(",") if label.strip()}
+    unknown = wanted - {label for label, _, _ in CONFIGS}
+    if unknown:
+        parser.error(f"unknown configs: {', '.join(sorted(unknown))} "
+                     f"(choose from {', '.join(label for label, _, _ in CONFIGS)})")
+
+    threads = configure_threads(args.threads)
+    if args.heldout:
+        sources, references = load_heldout(args.heldout)
+        sources, references = sources[:args.limit], references[:args.limit]
+    else:
+        sources, references = load_sentences(args.input, args.limit), None
+    print(f"{len(sources)} sentences, {args.backend}, {threads} threads")
+
+    results = []
+    for label, quantize, num_beams in CONFIGS:
+        if label not in wanted:
+            continue
+        translator, generate = make_translator(args.backend, quantize, num_beams)
+        translator.load_model()
+        # Warm up kernels before timing
+        generate(sources[:4])
+        start = time.perf_counter()
+        outputs = generate(sources)
+        elapsed = time.perf_counter() - start
+        if references is None and label == "fp32":
+            references = outputs
+        results.append({"config": label, "seconds": round(elapsed, 2),
+                        "sentences_per_second": round(len(sources) / elapsed, 2), "outputs": outputs})
+
+    baseline = next(result for result in results if result["config"] == "fp32")
+    print(f"{'config':>12} {'sent/s':>8} {'speedup':>8} {'chrF':>6} {'delta':>6}")
+    for result in results:
+        result["speedup"] = round(baseline["seconds"] / result["seconds"], 2)
+        result["chrf"] = round(chrf(result["outputs"], references), 1) if references else None
+    for result in results:
+        delta = result["chrf"] - baseline["chrf"] if result["chrf"] is not None else 0.0
+        result["chrf_delta"] = round(delta, 1)
+        print(f"{result['config']:>12} {result['sentences_per_second']:>8.2f} {result['speedup']:>7.2f}x "
+              f"{result['chrf'] or 0:>6.1f} {delta:>+6.1f}")
+        del result["outputs"]
+
+    with open(args.json, "w") as f:
+        json.dump({"backend": args.backend, "threads": threads, "sentences": len(sources),
+                   "reference": args.heldout or "fp32 output", "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
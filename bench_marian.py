@@ -0,0 +1,46 @@
+import argparse
+import time
+
+import torch
+from docx import Document
+
+from app5 import LocalTranslator
+from segments import collect_segments
+
+
+def load_texts(input_path: str, limit: int):
+    doc = Document(input_path)
+    texts = list(dict.fromkeys(segment.key for segment in collect_segments(doc)))
+    return texts[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MarianMT segments/second vs. batch size on CPU")
+    parser.add_argument("--input", default="input.docx")
+    parser.add_argument("--batch-sizes", default="1,4,8,16,32,64")
+    parser.add_argument("--limit", type=int, default=256, help="maximum number of unique segments to translate")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    translator = LocalTranslator()
+    translator.load_model()
+    texts = load_texts(args.input, args.limit)
+    print(f"{len(texts)} unique segments from {args.input} on {translator.device}, "
+          f"{torch.get_num_threads()} threads")
+
+    # Warm up allocator and kernels before timing
+    translator.generate_batch(texts[:4], 4)
+
+    print(f"{'batch':>6} {'seconds':>9} {'seg/s':>8}")
+    for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+        start = time.perf_counter()
+        translator.generate_batch(texts, batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"{batch_size:>6} {elapsed:>9.2f} {len(texts) / elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
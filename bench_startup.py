@@ -0,0 +1,81 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+from typing import List
+
+DEFAULT_MODULES = ["translate_dir", "pipeline", "backends", "benchmark", "app5", "app8", "app9", "app12", "app13"]
+HEAVY_MODULES = ("torch", "transformers", "langchain", "openai", "jina")
+
+
+def parse_importtime(stderr: str) -> List[dict]:
+    """Parse `python -X importtime` output into [{module, self_us, cumulative_us, depth}, ...]."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            # Nested imports are indented two spaces per level
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return entries
+
+
+def measure(module: str, top: int) -> dict:
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                             capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    entries = parse_importtime(process.stderr)
+    result = {
+        "module": module,
+        "ok": process.returncode == 0,
+        "wall_ms": round(wall * 1000, 1),
+        "import_ms": round(sum(e["cumulative_us"] for e in entries if e["depth"] == 0) / 1000, 1),
+        "heavy_imports": sorted({e["module"] for e in entries if e["module"].split(".")[0] in HEAVY_MODULES}),
+        "slowest": [
+            {"module": e["module"], "cumulative_ms": round(e["cumulative_us"] / 1000, 1)}
+            for e in sorted((e for e in entries if e["depth"] == 0), key=lambda e: -e["cumulative_us"])[:top]
+        ],
+    }
+    if not result["ok"]:
+        result["error"] = process.stderr.strip().splitlines()[-1]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure module import time with python -X importtime")
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES))
+    parser.add_argument("--top", type=int, default=5, help="slowest top-level imports to list per module")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="exit non-zero if any module takes longer than this to import")
+    parser.add_argument("--json", default=None, help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    results = [measure(module, args.top) for module in args.modules.split(",")]
+    failed = []
+    for result in results:
+        if not result["ok"]:
+            print(f"{result['module']:>14}: import failed ({result['error']})")
+            continue
+        heavy = ", ".join(result["heavy_imports"][:4]) or "none"
+        print(f"{result['module']:>14}: {result['import_ms']:8.1f} ms imports, "
+              f"{result['wall_ms']:8.1f} ms wall, heavy: {heavy}")
+        if args.max_ms is not None and result["import_ms"] > args.max_ms:
+            failed.append(result["module"])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if failed:
+        print(f"Over the {args.max_ms:.0f} ms budget: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
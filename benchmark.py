@@ -0,0 +1,183 @@
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+DEFAULT_INPUTS = ["input.docx", "input2.docx", "input3.docx"]
+DEFAULT_BACKENDS = ["marian", "indictrans2", "azure", "gpt4o", "google", "otranslator", "englisttohindi"]
+REMOTE_BACKENDS = {"google", "englisttohindi", "otranslator", "azure", "gpt4o"}
+
+
+class TimedBackend:
+    """Wraps a backend and records per-call latency and call counts."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.latencies = []
+        self.calls = 0
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        start = time.perf_counter()
+        results = self.backend.translate_batch(texts)
+        elapsed = time.perf_counter() - start
+        self.calls += 1
+        # Every segment of a batch becomes available when the call returns
+        self.latencies.extend([elapsed] * len(texts))
+        return results
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def make_backend(name: str, offline: bool, stub_latency: float):
+    from backends import StubBackend, load_backend
+
+    if not offline or name not in REMOTE_BACKENDS:
+        return load_backend(name)
+    if name == "gpt4o":
+        # Exercise the real async engine against a local latency-injecting model
+        from async_engine import FakeChatModel
+        return load_backend(name, llm=FakeChatModel(latency=stub_latency))
+    real = load_backend(name)
+    return StubBackend(name=f"{name}-stub", latency=stub_latency, max_batch_size=real.max_batch_size)
+
+
+def init_child(memory_path: str):
+    # Give each run an empty translation memory so it measures the backend, not the cache
+    os.environ["TRANSLATION_MEMORY_PATH"] = memory_path
+
+
+def run_backend(name: str, inputs: List[str], offline: bool, stub_latency: float) -> dict:
+    from metrics import REGISTRY
+    from pipeline import translate_document
+
+    result = {"backend": name, "offline_stub": offline and name in REMOTE_BACKENDS}
+    backend = make_backend(name, offline, stub_latency)
+    start = time.perf_counter()
+    # Local models load lazily; load them here so the load time is measured on its own
+    load_model = getattr(backend.translator, "load_model", None)
+    if load_model is not None:
+        load_model()
+    result["load_seconds"] = round(time.perf_counter() - start, 3)
+
+    timed = TimedBackend(backend)
+    segments = unique = 0
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as output_dir:
+        for path in inputs:
+            summary = translate_document(path, os.path.join(output_dir, os.path.basename(path)), timed)
+            segments += summary["segments"]
+            unique += summary["unique"]
+    elapsed = time.perf_counter() - start
+
+    translated = len(timed.latencies)
+    engine_requests = getattr(backend.translator, "requests", None)
+    if engine_requests is not None:
+        api_calls = engine_requests
+    elif hasattr(backend, "api_calls"):
+        api_calls = backend.api_calls
+    elif hasattr(backend.translator, "resilience"):
+        api_calls = backend.translator.resilience.attempts
+    elif name in REMOTE_BACKENDS:
+        # The remote adapters send one request per segment
+        api_calls = translated
+    else:
+        api_calls = 0
+    result.update({
+        "documents": len(inputs),
+        "segments": segments,
+        "unique_segments": unique,
+        "translated_units": translated,
+        "translate_seconds": round(elapsed, 3),
+        "segments_per_second": round(translated / elapsed, 2) if elapsed else 0.0,
+        "p50_latency_ms": round(percentile(timed.latencies, 50) * 1000, 1),
+        "p95_latency_ms": round(percentile(timed.latencies, 95) * 1000, 1),
+        "backend_calls": timed.calls,
+        "api_calls": api_calls,
+        "peak_rss_mb": peak_rss_mb(),
+        # Where the time went: load, extract, translate, writeback and save
+        "stage_seconds": {
+            timing["labels"]["stage"]: round(timing["sum"], 3)
+            for timing in REGISTRY.to_dict()["timings"] if timing["name"] == "stage_seconds"
+        },
+    })
+    return result
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        # No resource module on Windows
+        return None
+    # ru_maxrss is reported in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def format_table(results: List[dict]) -> str:
+    columns = [
+        ("Backend", "backend"), ("Load (s)", "load_seconds"), ("Seg/s", "segments_per_second"),
+        ("p50 (ms)", "p50_latency_ms"), ("p95 (ms)", "p95_latency_ms"), ("Peak RSS (MB)", "peak_rss_mb"),
+        ("API calls", "api_calls"), ("Segments", "segments"), ("Unique", "unique_segments"),
+    ]
+    lines = [
+        "| " + " | ".join(title for title, _ in columns) + " |",
+        "|" + "|".join("---" for _ in columns) + "|",
+    ]
+    for result in results:
+        if "error" in result:
+            lines.append(f"| {result['backend']} | failed: {result['error']} |")
+            continue
+        name = result["backend"] + (" (stub)" if result.get("offline_stub") else "")
+        cells = [name] + [str(result[key]) for _, key in columns[1:]]
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare translation backends on the bundled documents")
+    parser.add_argument("--backends", default=",".join(DEFAULT_BACKENDS))
+    parser.add_argument("--inputs", nargs="+", default=DEFAULT_INPUTS)
+    parser.add_argument("--offline", action="store_true",
+                        help="replace remote backends with local stubs so the benchmark runs without network")
+    parser.add_argument("--stub-latency", type=float, default=0.3, help="seconds per stubbed remote call")
+    parser.add_argument("--json", default="benchmark_results.json")
+    parser.add_argument("--table", default="benchmark_results.md")
+    args = parser.parse_args()
+
+    inputs = [path for path in args.inputs if os.path.exists(path)]
+    results = []
+    for name in args.backends.split(","):
+        print(f"Benchmarking {name}...")
+        # A fresh process per backend keeps model memory and peak RSS separate
+        with tempfile.TemporaryDirectory() as memory_dir, ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_child, initargs=(os.path.join(memory_dir, "memory.db"),)
+        ) as pool:
+            try:
+                results.append(pool.submit(run_backend, name, inputs, args.offline, args.stub_latency).result())
+            except Exception as e:
+                results.append({"backend": name, "error": str(e)})
+
+    table = format_table(results)
+    print(table)
+    with open(args.json, "w") as f:
+        json.dump({"inputs": inputs, "offline": args.offline, "results": results}, f, indent=2)
+    with open(args.table, "w") as f:
+        f.write(table + "\n")
+
+
+if __name__ == "__main__":
+    main()
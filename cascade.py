@@ -0,0 +1,135 @@
+import time
+from typing import List, Optional
+
+from batching import estimate_tokens
+from metrics import REGISTRY, Metrics
+from runs import TAG_TOKEN
+from segmentation import join_units, segment_text, split_sentences
+
+
+class CascadeTranslator:
+    """
+    Route each segment to the cheapest backend that can handle it: short,
+    simple segments go to the local model, and long ones, multi-sentence
+    ones, run-tagged paragraphs (which local models cannot keep tags in) and
+    local translations below min_confidence go to the LLM.
+
+    Routing decisions, timings and the estimated LLM cost avoided are
+    recorded in the metrics registry; see savings_report().
+    """
+
+    def __init__(self, local, llm, max_words: int = 25, max_sentences: int = 1, min_confidence: float = 0.5):
+        self.local = local
+        self.llm = llm
+        self.max_words = max_words
+        self.max_sentences = max_sentences
+        self.min_confidence = min_confidence
+
+    def load_model(self):
+        load_model = getattr(self.local.translator, "load_model", None)
+        if load_model is not None:
+            load_model()
+
+    def route(self, text: str) -> Optional[str]:
+        """Why text skips the local model ("tagged", "long", "complex"), or None to try it locally."""
+        if TAG_TOKEN.search(text):
+            return "tagged"
+        if len(text.split()) > self.max_words:
+            return "long"
+        if len(split_sentences(text.strip())) > self.max_sentences:
+            return "complex"
+        return None
+
+    def _translate_local(self, texts: List[str]) -> List[tuple]:
+        # Paragraphs are scored sentence by sentence; a paragraph is as confident as its weakest sentence
+        max_chars = getattr(self.local.translator, "max_chars", 400)
+        layouts = [segment_text(text, max_chars) for text in texts]
+        units = list(dict.fromkeys(unit for unit_list, _ in layouts for unit in unit_list))
+        translate_scored = getattr(self.local.translator, "translate_scored", None)
+        if translate_scored is not None:
+            scored = dict(zip(units, translate_scored(units)))
+        else:
+            scored = {unit: (translation, 1.0) for unit, translation in zip(units, self.local.translate_batch(units))}
+        results = []
+        for text, (unit_list, separators) in zip(texts, layouts):
+            if not unit_list:
+                results.append((text, 1.0))
+                continue
+            translation = join_units([scored[unit][0] for unit in unit_list], separators)
+            results.append((translation, min(scored[unit][1] for unit in unit_list)))
+        return results
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        results = list(texts)
+        escalated = {}
+        candidates = []
+        for i, text in enumerate(texts):
+            if not text.strip():
+                continue
+            reason = self.route(text)
+            if reason is None:
+                candidates.append(i)
+            else:
+                escalated[i] = reason
+
+        if candidates:
+            start = time.perf_counter()
+            local_results = self._translate_local([texts[i] for i in candidates])
+            REGISTRY.observe("cascade_seconds", time.perf_counter() - start, route="local")
+            for i, (translation, confidence) in zip(candidates, local_results):
+                if confidence < self.min_confidence:
+                    escalated[i] = "low_confidence"
+                    continue
+                results[i] = translation
+                REGISTRY.inc("cascade_segments", route="local", reason="simple")
+                tokens = estimate_tokens(texts[i]) + estimate_tokens(translation)
+                REGISTRY.inc("cascade_saved_usd", tokens * self.llm.cost_per_token)
+
+        if escalated:
+            indices = sorted(escalated)
+            start = time.perf_counter()
+            translations = self.llm.translate_batch([texts[i] for i in indices])
+            REGISTRY.observe("cascade_seconds", time.perf_counter() - start, route="llm")
+            for i, translation in zip(indices, translations):
+                results[i] = translation
+                REGISTRY.inc("cascade_segments", route="llm", reason=escalated[i])
+                tokens = estimate_tokens(texts[i]) + estimate_tokens(translation)
+                REGISTRY.inc("cascade_llm_usd", tokens * self.llm.cost_per_token)
+        return results
+
+
+def savings_report(metrics: Metrics = REGISTRY) -> str:
+    """
+    Cost and latency of a cascade run against sending every segment to the
+    LLM. The LLM-only latency is extrapolated from the LLM's own seconds per
+    segment in this run, so it needs at least one escalated segment.
+    """
+    data = metrics.to_dict()
+    local = sum(c["value"] for c in data["counters"]
+                if c["name"] == "cascade_segments" and c["labels"].get("route") == "local")
+    reasons = {}
+    for counter in data["counters"]:
+        if counter["name"] == "cascade_segments" and counter["labels"].get("route") == "llm":
+            reason = counter["labels"].get("reason")
+            reasons[reason] = reasons.get(reason, 0) + counter["value"]
+    llm = sum(reasons.values())
+    saved = sum(c["value"] for c in data["counters"] if c["name"] == "cascade_saved_usd")
+    spent = sum(c["value"] for c in data["counters"] if c["name"] == "cascade_llm_usd")
+    seconds = {t["labels"].get("route"): t["sum"] for t in data["timings"] if t["name"] == "cascade_seconds"}
+    total = local + llm
+    if not total:
+        return "Cascade: no segments routed"
+
+    lines = [
+        f"Cascade: {local:g} of {total:g} segments served locally, {llm:g} escalated to the LLM"
+        + (f" ({', '.join(f'{reason} {count:g}' for reason, count in sorted(reasons.items()))})" if reasons else ""),
+        f"  LLM cost: ${spent:.4f} instead of ${spent + saved:.4f} LLM-only (saved ${saved:.4f})",
+    ]
+    actual = seconds.get("local", 0.0) + seconds.get("llm", 0.0)
+    if llm:
+        llm_only = seconds.get("llm", 0.0) / llm * total
+        lines.append(f"  Latency: {actual:.1f}s instead of ~{llm_only:.1f}s LLM-only "
+                     f"(saved ~{llm_only - actual:.1f}s)")
+    else:
+        lines.append(f"  Latency: {actual:.1f}s (no LLM calls to extrapolate an LLM-only time from)")
+    return "\n".join(lines)
@@ -0,0 +1,88 @@
+import os
+from collections import Counter
+from typing import List, Optional
+
+
+def configure_threads(threads: Optional[int] = None, workers: int = 1) -> int:
+    """
+    Set torch's intra-op thread count: threads if given, otherwise the cores
+    split evenly between workers. Inter-op parallelism is limited to one
+    thread, since generate() runs one op graph at a time. Returns the count.
+    """
+    import torch
+
+    threads = threads or max(1, (os.cpu_count() or 1) // max(1, workers))
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Can only be set before the first parallel op of the process
+        pass
+    return threads
+
+
+def quantize_dynamic(model):
+    """Dynamic int8 quantization of every Linear layer (weights int8, activations quantized on the fly)."""
+    import torch
+
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def decoding_key(model_name: str, quantize: bool, num_beams: Optional[int], default_beams: Optional[int]) -> str:
+    """Translation memory model key; non-default inference settings get their own cache entries."""
+    key = model_name
+    if quantize:
+        key += "|int8"
+    if num_beams is not None and num_beams != default_beams:
+        key += f"|beams={num_beams}"
+    return key
+
+
+def sequence_confidences(model, inputs: dict, sequences, pad_token_id: int, chunk_size: int = 8) -> List[float]:
+    """
+    exp(mean token log-probability) of each generated sequence under the
+    model, from one teacher-forced pass over the generate() output. Scored in
+    chunks so the (rows, length, vocabulary) logits stay small.
+    """
+    import torch
+
+    confidences = []
+    for start in range(0, len(sequences), chunk_size):
+        rows = sequences[start:start + chunk_size]
+        chunk = {key: value[start:start + chunk_size] for key, value in inputs.items()}
+        labels = rows[:, 1:]
+        with torch.inference_mode():
+            logits = model(**chunk, decoder_input_ids=rows[:, :-1]).logits
+        logprobs = torch.log_softmax(logits.float(), dim=-1).gather(-1, labels.unsqueeze(-1)).squeeze(-1)
+        mask = labels != pad_token_id
+        mean = torch.where(mask, logprobs, torch.zeros_like(logprobs)).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        confidences.extend(torch.exp(mean).tolist())
+    return confidences
+
+
+def _char_ngrams(text: str, n: int) -> Counter:
+    text = "".join(text.split())
+    return Counter(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def chrf(hypotheses: List[str], references: List[str], max_n: int = 6, beta: float = 2.0) -> float:
+    """
+    Corpus-level chrF (character n-gram F-score, n = 1..max_n, whitespace
+    ignored) on a 0-100 scale, as in sacreBLEU's default chrF.
+    """
+    matches = [0] * max_n
+    hyp_counts = [0] * max_n
+    ref_counts = [0] * max_n
+    for hypothesis, reference in zip(hypotheses, references):
+        for n in range(1, max_n + 1):
+            hyp = _char_ngrams(hypothesis, n)
+            ref = _char_ngrams(reference, n)
+            matches[n - 1] += sum((hyp & ref).values())
+            hyp_counts[n - 1] += sum(hyp.values())
+            ref_counts[n - 1] += sum(ref.values())
+
+    precision = sum(m / h for m, h in zip(matches, hyp_counts) if h) / max_n
+    recall = sum(m / r for m, r in zip(matches, ref_counts) if r) / max_n
+    if precision + recall == 0:
+        return 0.0
+    return 100 * (1 + beta ** 2) * precision * recall / (beta ** 2 * precision + recall)
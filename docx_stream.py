@@ -0,0 +1,206 @@
+import io
+import re
+import zipfile
+from typing import Dict, Iterator, List, Tuple
+
+from lxml import etree
+
+from translation_memory import normalize_text
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+W_P = f"{{{W_NS}}}p"
+W_T = f"{{{W_NS}}}t"
+W_BODY = f"{{{W_NS}}}body"
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+DOCUMENT_PART = "word/document.xml"
+# Headers, footers, footnotes and endnotes: the stories outside the body
+STORY_PART = re.compile(r"word/(header\d*|footer\d*|footnotes|endnotes)\.xml")
+
+
+class TextSegment:
+    """Text of one w:p, addressed as "<part>#<path>", e.g. "word/document.xml#body/tbl[1]/tr[2]/tc[1]/p[1]"."""
+
+    __slots__ = ("address", "text", "translation")
+
+    def __init__(self, address: str, text: str):
+        self.address = address
+        self.text = text
+        self.translation = None
+
+    @property
+    def key(self) -> str:
+        return normalize_text(self.text)
+
+    def apply(self, translation: str):
+        self.translation = translation
+
+
+def walk_paragraphs(element, path: str) -> Iterator[Tuple[str, etree._Element]]:
+    """
+    Yield (path, w:p) for every paragraph below element. Each step of the path
+    is the child's local name with its 1-based index among same-named
+    siblings, so addresses are stable between reading and writing.
+    """
+    counts = {}
+    for child in element:
+        if not isinstance(child.tag, str):
+            continue
+        local = etree.QName(child).localname
+        counts[local] = counts.get(local, 0) + 1
+        child_path = f"{path}/{local}[{counts[local]}]"
+        if child.tag == W_P:
+            yield child_path, child
+        yield from walk_paragraphs(child, child_path)
+
+
+def paragraph_text_nodes(p) -> List[etree._Element]:
+    # Only the paragraph's own runs; text boxes nested inside it are separate paragraphs
+    return [t for t in p.iter(W_T) if next(t.iterancestors(W_P)) is p]
+
+
+def _stream_blocks(source) -> Iterator[Tuple[str, str, etree._Element]]:
+    """
+    Iterate a part's top-level blocks (children of w:body, or of the root for
+    headers/footers/notes) as complete subtrees, yielding ("start", path,
+    element) for the enclosing elements and ("block", path, element) for
+    each block. Blocks are cleared by the caller once handled.
+    """
+    depth = 0
+    container_depth = 1
+    counts = {}
+    for event, element in etree.iterparse(source, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 1 or (depth == 2 and element.tag == W_BODY):
+                if element.tag == W_BODY:
+                    container_depth = 2
+                yield "start", "", element
+            continue
+        if depth == container_depth + 1:
+            local = etree.QName(element).localname
+            counts[local] = counts.get(local, 0) + 1
+            prefix = "body/" if container_depth == 2 else ""
+            yield "block", f"{prefix}{local}[{counts[local]}]", element
+        elif depth <= container_depth:
+            yield "end", "", element
+        depth -= 1
+
+
+def _block_paragraphs(path: str, block) -> Iterator[Tuple[str, etree._Element]]:
+    if block.tag == W_P:
+        yield path, block
+    yield from walk_paragraphs(block, path)
+
+
+def _release(block):
+    # Drop handled blocks so memory stays flat across large parts
+    block.clear()
+    parent = block.getparent()
+    if parent is not None:
+        while block.getprevious() is not None:
+            del parent[0]
+
+
+def read_part(part: str, data: bytes) -> List[TextSegment]:
+    segments = []
+    for kind, path, element in _stream_blocks(io.BytesIO(data)):
+        if kind != "block":
+            continue
+        for p_path, p in _block_paragraphs(path, element):
+            text = "".join(t.text or "" for t in paragraph_text_nodes(p))
+            if text.strip():
+                segments.append(TextSegment(f"{part}#{p_path}", text))
+        _release(element)
+    return segments
+
+
+def read_segments(path: str, parts: Tuple[str, ...] = (DOCUMENT_PART,)) -> List[TextSegment]:
+    """Collect every non-empty paragraph of the given package parts in one streaming pass each."""
+    segments = []
+    with zipfile.ZipFile(path) as package:
+        names = set(package.namelist())
+        for part in parts:
+            if part in names:
+                segments.extend(read_part(part, package.read(part)))
+    return segments
+
+
+def story_parts(path: str) -> Tuple[str, ...]:
+    """The document part followed by every header, footer and notes part in the package."""
+    with zipfile.ZipFile(path) as package:
+        names = sorted(name for name in package.namelist() if STORY_PART.fullmatch(name))
+    return (DOCUMENT_PART, *names)
+
+
+def set_paragraph_text(p, text: str):
+    # The first run keeps its formatting and takes the whole translation
+    nodes = paragraph_text_nodes(p)
+    if not nodes:
+        return
+    nodes[0].text = text
+    nodes[0].set(XML_SPACE, "preserve")
+    for node in nodes[1:]:
+        node.text = ""
+
+
+def _qualified_name(element) -> str:
+    local = etree.QName(element).localname
+    return f"{element.prefix}:{local}" if element.prefix else local
+
+
+def _strip_inherited_namespaces(raw: bytes, nsmap: dict) -> bytes:
+    # A standalone-serialized block redeclares every namespace in scope on its
+    # start tag; drop the ones the part's root already declares
+    end = raw.index(b">")
+
+    def inherited(match):
+        prefix = match.group(1).decode() if match.group(1) else None
+        return b"" if nsmap.get(prefix) == match.group(2).decode() else match.group(0)
+
+    return re.sub(rb'\sxmlns(?::([\w.-]+))?="([^"]*)"', inherited, raw[:end]) + raw[end:]
+
+
+def rewrite_part(part: str, data: bytes, translations: Dict[str, str]) -> bytes:
+    """
+    Stream a part through iterparse, replacing paragraph text by address and
+    serializing each top-level block as soon as it is complete. The prolog
+    and enclosing start tags are copied from the source bytes unchanged.
+    """
+    out = io.BytesIO()
+    root_nsmap = {}
+    closing_tags = []
+    for kind, path, element in _stream_blocks(io.BytesIO(data)):
+        if kind == "start":
+            if element.getparent() is None:
+                root_nsmap = element.nsmap
+                match = re.search(rb"<(?![?!])[^>]*>", data)
+                out.write(data[:match.end()])
+            else:
+                match = re.search(rb"<%s\b[^>]*>" % _qualified_name(element).encode(), data)
+                out.write(match.group())
+            closing_tags.append(f"</{_qualified_name(element)}>".encode())
+        elif kind == "block":
+            for p_path, p in _block_paragraphs(path, element):
+                translation = translations.get(f"{part}#{p_path}")
+                if translation is not None:
+                    set_paragraph_text(p, translation)
+            out.write(_strip_inherited_namespaces(etree.tostring(element, with_tail=False), root_nsmap))
+            _release(element)
+        else:
+            out.write(closing_tags.pop())
+    return out.getvalue()
+
+
+def write_translations(input_path: str, output_path: str, translations: Dict[str, str]):
+    """
+    Copy the package, rewriting only parts that have translated paragraphs.
+    Every other zip member is copied unchanged with its original compression.
+    """
+    parts = {address.split("#", 1)[0] for address in translations}
+    with zipfile.ZipFile(input_path) as source, zipfile.ZipFile(output_path, "w") as target:
+        for item in source.infolist():
+            data = source.read(item)
+            if item.filename in parts:
+                data = rewrite_part(item.filename, data, translations)
+            target.writestr(item, data, compress_type=item.compress_type)
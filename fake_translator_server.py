@@ -0,0 +1,112 @@
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+class FakeTranslatorHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the Azure Translator container (POST /translate) and
+    the OTranslator task API (POST /create, /queryTexts) that injects 429 and
+    5xx responses, for exercising retries and circuit breakers offline.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body=None, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _inject_failure(self) -> bool:
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            fail = server.random.random() < server.fail_rate
+            if fail:
+                server.failures += 1
+        if not fail:
+            return False
+        if server.failures % 2:
+            self._send(429, {"error": "Too Many Requests"}, {"Retry-After": str(server.retry_after)})
+        else:
+            self._send(503, {"error": "Service Unavailable"})
+        return True
+
+    def do_GET(self):
+        self._send(200, {"status": "ok"})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+        if self._inject_failure():
+            return
+        time.sleep(self.server.latency)
+        path = urlparse(self.path).path
+        prefix = self.server.prefix
+        if path.endswith("/translate"):
+            self._send(200, [{"translations": [{"text": prefix + item["Text"], "to": "hi"}]} for item in body])
+        elif path.endswith("/create"):
+            task_id = uuid.uuid4().hex
+            with self.server.lock:
+                self.server.tasks[task_id] = (time.monotonic() + self.server.task_seconds, body["texts"])
+            self._send(200, {"taskId": task_id})
+        elif path.endswith("/queryTexts"):
+            ready_at, texts = self.server.tasks.get(body["taskId"], (0, []))
+            if time.monotonic() < ready_at:
+                self._send(200, {"status": "Processing", "translations": {}})
+            else:
+                self._send(200, {"status": "Completed",
+                                 "translations": {str(i): prefix + text for i, text in enumerate(texts)}})
+        else:
+            self._send(404, {"error": "Not Found"})
+
+
+def start_server(port: int = 0, fail_rate: float = 0.3, retry_after: float = 1.0, latency: float = 0.0,
+                 task_seconds: float = 1.0, prefix: str = "[hi] ", seed: int = 0) -> ThreadingHTTPServer:
+    """Serve in a background thread; port 0 picks a free port (see server.server_address)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeTranslatorHandler)
+    server.daemon_threads = True
+    server.fail_rate = fail_rate
+    server.retry_after = retry_after
+    server.latency = latency
+    server.task_seconds = task_seconds
+    server.prefix = prefix
+    server.random = random.Random(seed)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.failures = 0
+    server.tasks = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake translation service that injects 429 and 5xx responses")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--fail-rate", type=float, default=0.3, help="fraction of requests answered with 429/503")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each successful reply")
+    parser.add_argument("--task-seconds", type=float, default=1.0, help="time until an OTranslator task completes")
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.fail_rate, args.retry_after, args.latency, args.task_seconds)
+    print(f"Fake translator listening on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
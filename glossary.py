@@ -0,0 +1,182 @@
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from metrics import REGISTRY
+
+DEFAULT_PATH = os.environ.get("GLOSSARY_PATH", "glossary.tsv")
+
+# Masked terms travel through the backend as [T1], [T2], ...; restoring also
+# accepts the spacing and transliteration models sometimes introduce ("[ T 1 ]", "[टी1]")
+PLACEHOLDER = "[T{}]"
+PLACEHOLDER_PATTERN = re.compile(r"\[\s*(?:T|टी)\s*(\d+)\s*\]")
+PLACEHOLDER_INSTRUCTIONS = " Keep placeholders such as [T1] exactly as they are, in the matching position."
+
+
+def _fold(text: str) -> str:
+    # Lowercase character by character so match offsets line up with the original text
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+class Glossary:
+    """
+    Protected terms and forced translations, matched in every segment with an
+    Aho-Corasick automaton, so a pass over a segment costs the same whether
+    the glossary holds ten terms or ten thousand.
+
+    Terms match whole words, case-insensitively unless written in capitals
+    ("EPS", "PAT"). Overlapping matches resolve to the leftmost, then longest.
+    A term mapped to None is kept as written in the source; otherwise its
+    forced translation is put in place after translation.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Optional[str]]] = None):
+        self.entries: List[Tuple[str, Optional[str]]] = []
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+        for term, target in (entries or {}).items():
+            self.add(term, target)
+        self.build()
+        self.masked = 0
+        self.lost = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, term: str, target: Optional[str] = None):
+        term = " ".join(term.split())
+        if not term:
+            return
+        node = 0
+        for char in _fold(term):
+            if char not in self.goto[node]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[node][char] = len(self.goto) - 1
+            node = self.goto[node][char]
+        if not self.output[node]:
+            self.entries.append((term, target or None))
+            self.output[node].append(len(self.entries) - 1)
+
+    def build(self):
+        """Compute failure links breadth-first; call again after add()."""
+        self.output = [outputs[:1] for outputs in self.output]
+        queue = list(self.goto[0].values())
+        for node in queue:
+            self.fail[node] = 0
+        for node in queue:
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        """Non-overlapping (start, end, entry index) matches in text."""
+        matches = []
+        node = 0
+        for i, char in enumerate(_fold(text)):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            for index in self.output[node]:
+                term = self.entries[index][0]
+                start = i + 1 - len(term)
+                if start > 0 and text[start - 1].isalnum() or i + 1 < len(text) and text[i + 1].isalnum():
+                    continue
+                if term.isupper() and text[start:i + 1] != term:
+                    continue
+                matches.append((start, i + 1, index))
+        matches.sort(key=lambda match: (match[0], match[0] - match[1]))
+        chosen = []
+        end = 0
+        for match in matches:
+            if match[0] >= end:
+                chosen.append(match)
+                end = match[1]
+        return chosen
+
+    def mask(self, text: str) -> Tuple[str, List[str]]:
+        """Replace each matched term with a numbered placeholder; returns the replacements in order."""
+        pieces = []
+        replacements = []
+        last = 0
+        for start, end, index in self.find(text):
+            replacements.append(self.entries[index][1] or text[start:end])
+            pieces.append(text[last:start] + PLACEHOLDER.format(len(replacements)))
+            last = end
+        pieces.append(text[last:])
+        return "".join(pieces), replacements
+
+    def restore(self, text: str, replacements: List[str]) -> str:
+        found = set()
+
+        def replace(match):
+            number = int(match.group(1))
+            if 1 <= number <= len(replacements):
+                found.add(number)
+                return replacements[number - 1]
+            return match.group(0)
+
+        restored = PLACEHOLDER_PATTERN.sub(replace, text)
+        lost = len(replacements) - len(found)
+        if lost:
+            self.lost += lost
+            REGISTRY.inc("glossary_lost", lost)
+        return restored
+
+    def wrap(self, translate_batch: Callable[[List[str]], List[str]]) -> Callable[[List[str]], List[str]]:
+        """
+        Mask glossary terms before translate_batch and restore them after.
+        Segments that are nothing but glossary terms never reach the backend.
+        """
+        if not self.entries:
+            return translate_batch
+
+        def translate(texts: List[str]) -> List[str]:
+            masked = [self.mask(text) for text in texts]
+            results = [None] * len(texts)
+            pending = []
+            for i, (text, replacements) in enumerate(masked):
+                if replacements and not re.search(r"\w", PLACEHOLDER_PATTERN.sub("", text)):
+                    results[i] = self.restore(text, replacements)
+                else:
+                    pending.append(i)
+            protected = sum(len(replacements) for _, replacements in masked)
+            self.masked += protected
+            if protected:
+                REGISTRY.inc("glossary_terms", protected)
+            if pending:
+                translations = translate_batch([masked[i][0] for i in pending])
+                for i, translation in zip(pending, translations):
+                    results[i] = self.restore(translation, masked[i][1])
+            return results
+
+        return translate
+
+    def report(self) -> str:
+        return (f"Glossary: {len(self.entries)} terms, {self.masked} occurrences protected, "
+                f"{self.lost} lost by the backend")
+
+
+def load_glossary(path: Optional[str] = None) -> Glossary:
+    """
+    Read a glossary file: one term per line, optionally followed by a tab and
+    its forced translation; blank lines and lines starting with # are ignored.
+    A missing file gives an empty glossary, which leaves translation unchanged.
+    """
+    path = path or DEFAULT_PATH
+    entries = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line.strip() or line.startswith("#"):
+                    continue
+                term, _, target = line.partition("\t")
+                entries[term.strip()] = target.strip() or None
+    return Glossary(entries)
@@ -0,0 +1,124 @@
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from docx import Document
+from docx.text.paragraph import Paragraph
+
+from docx_stream import paragraph_text_nodes, walk_paragraphs
+from runs import TaggedParagraph, run_text, visible_format
+from segments import ParagraphSegment, story_roots
+from translation_memory import normalize_text
+
+
+def structural_units(doc, include_runs: bool = False) -> Iterator[Tuple[tuple, object]]:
+    """
+    Yield (position, unit) for every cell of the body's top-level tables and
+    every body paragraph (the units collect_segments sends by default, at
+    ("tbl", 0, 2, 1) and ("p", 14)), then for every paragraph of every story
+    (the units of all_stories and streaming) at
+    ("/word/document.xml", "/tbl[1]/tr[2]/tc[1]/p[1]"), and with
+    include_runs each of its runs at (part, path, "r", 0). Paths are those of
+    docx_stream.walk_paragraphs, so positions stay the same between a source
+    document and its translation, whether it was translated in place (app12,
+    the shared pipeline) or rebuilt table by table and paragraph by paragraph
+    (app13).
+    """
+    for t, table in enumerate(doc.tables):
+        for r, row in enumerate(table.rows):
+            for c, cell in enumerate(row.cells):
+                yield ("tbl", t, r, c), cell
+    for i, para in enumerate(doc.paragraphs):
+        yield ("p", i), para
+    for part, root in story_roots(doc):
+        for path, p in walk_paragraphs(root, ""):
+            para = Paragraph(p, None)
+            yield (part, path), para
+            if include_runs:
+                for j, run in enumerate(para.runs):
+                    yield (part, path, "r", j), run
+
+
+def tagged_translation(tagged: TaggedParagraph, translated_para) -> Optional[str]:
+    """
+    Rebuild the tagged translation of a paragraph from its translated
+    counterpart, matching each translated run to an unused source run with
+    the same visible formatting. Returns None if a run has no match.
+    """
+    if len(tagged.runs) < 2:
+        return "".join(t.text or "" for t in paragraph_text_nodes(translated_para._p))
+    formats = [visible_format(run) for run in tagged.runs]
+    used = set()
+    pieces = []
+    for run in translated_para.runs:
+        text = run_text(run)
+        if not text:
+            continue
+        index = next((i for i, fmt in enumerate(formats) if i not in used and fmt == visible_format(run)), None)
+        if index is None:
+            return None
+        used.add(index)
+        pieces.append(f"<r{index + 1}>{text}</r{index + 1}>")
+    # Source runs the translation left empty keep their (empty) tag
+    pieces += [f"<r{i + 1}></r{i + 1}>" for i in range(len(formats)) if i not in used]
+    return "".join(pieces)
+
+
+def align_translations(old_source: str, old_output: str, include_runs: bool = False,
+                       tag_runs: bool = False) -> Dict[str, str]:
+    """
+    Pair the previous source with its translated output by structural
+    position and index the pairs by normalized source text (in the same form
+    collect_segments and the streaming reader produce for the given
+    include_runs/tag_runs, with or without all_stories). Units the
+    output left untranslated are skipped; where one source text was
+    translated differently in different places, the first wins.
+    """
+    translated = dict(structural_units(Document(old_output), include_runs))
+    translations = {}
+    for position, unit in structural_units(Document(old_source), include_runs):
+        counterpart = translated.get(position)
+        if counterpart is None:
+            continue
+        if position[0] == "tbl" or len(position) > 2 or position[0] == "p" and not tag_runs:
+            text, translation = unit.text, counterpart.text
+        elif tag_runs:
+            tagged = TaggedParagraph(unit)
+            text, translation = tagged.text, tagged_translation(tagged, counterpart)
+        else:
+            text, translation = ParagraphSegment(unit._p).text, ParagraphSegment(counterpart._p).text
+        key = normalize_text(text)
+        if not key or translation is None or normalize_text(translation) == key:
+            continue
+        translations.setdefault(key, translation.strip())
+    return translations
+
+
+class IncrementalTranslation:
+    """
+    Reuse the translations of a document's previous revision: segments whose
+    source text is unchanged take the translation found in the previous
+    output (including any edits made to it since), and only new or edited
+    segments go to the backend.
+    """
+
+    def __init__(self, old_source: str, old_output: str, include_runs: bool = False, tag_runs: bool = False):
+        self.translations = align_translations(old_source, old_output, include_runs, tag_runs)
+        self.reused = 0
+        self.retranslated = 0
+
+    def wrap(self, translate_batch: Callable[[List[str]], List[str]]) -> Callable[[List[str]], List[str]]:
+        def translate(texts: List[str]) -> List[str]:
+            results = [self.translations.get(normalize_text(text)) for text in texts]
+            missing = [i for i, result in enumerate(results) if result is None]
+            self.reused += len(texts) - len(missing)
+            self.retranslated += len(missing)
+            if missing:
+                for i, translation in zip(missing, translate_batch([texts[i] for i in missing])):
+                    results[i] = translation
+            return results
+
+        return translate
+
+    def report(self) -> str:
+        total = self.reused + self.retranslated
+        return (f"Incremental: {self.reused} of {total} unique segments reused from the previous revision, "
+                f"{self.retranslated} retranslated")
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+from typing import Callable, List, Optional
+
+from translation_memory import normalize_text
+
+DEFAULT_JOURNAL_DIR = ".translation_jobs"
+
+
+def segment_id(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def job_id(input_path: str, job_key: str = "") -> str:
+    digest = hashlib.sha256()
+    with open(input_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    digest.update(job_key.encode("utf-8"))
+    return digest.hexdigest()[:24]
+
+
+class TranslationJournal:
+    """
+    Append-only JSONL checkpoint of the segments a job has finished.
+
+    The journal is named after a hash of the input file plus job_key (backend,
+    model, prompt), so rerunning the same input with the same settings picks
+    up the completed segments and only translates the remainder.
+    """
+
+    def __init__(self, input_path: str, job_key: str = "", directory: str = DEFAULT_JOURNAL_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{job_id(input_path, job_key)}.jsonl")
+        self.done = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A crash can leave the last line half written
+                        continue
+                    self.done[entry["id"]] = entry["translation"]
+        self.resumed = len(self.done)
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def get(self, text: str) -> Optional[str]:
+        return self.done.get(segment_id(text))
+
+    def record(self, text: str, translation: str):
+        # Backends hand back the source on failure; leave those for the rerun
+        if translation is None or translation.strip() == text.strip():
+            return
+        key = segment_id(text)
+        if self.done.get(key) == translation:
+            return
+        self.done[key] = translation
+        self.file.write(json.dumps({"id": key, "source": text, "translation": translation}, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def wrap(self, translate_batch: Callable[[List[str]], List[str]],
+             chunk_size: Optional[int] = None) -> Callable[[List[str]], List[str]]:
+        """
+        Serve already-journaled texts and send only the rest to translate_batch,
+        checkpointing after every chunk_size texts (or once, if None).
+        """
+        def translate(texts: List[str]) -> List[str]:
+            results = [self.get(text) for text in texts]
+            missing = [i for i, result in enumerate(results) if result is None]
+            step = chunk_size or max(1, len(missing))
+            for start in range(0, len(missing), step):
+                chunk = missing[start:start + step]
+                for i, translation in zip(chunk, translate_batch([texts[i] for i in chunk])):
+                    results[i] = translation
+                    self.record(texts[i], translation)
+            return results
+
+        return translate
+
+    def close(self):
+        self.file.close()
+
+    def complete(self):
+        # The job finished and its output is saved; the checkpoint is no longer needed
+        self.close()
+        os.remove(self.path)
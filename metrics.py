@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+PREFIX = "docx_translation_"
+
+
+def _key(name: str, labels: dict) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Metrics:
+    """
+    Thread-safe counters and timing summaries with labels, exportable as JSON
+    or Prometheus text format. Timings are kept as count/sum/max per series.
+
+    Stage timings go to "stage_seconds" (stage="load", "extract", "prefilter",
+    "translate", "writeback", "save"); backend requests record "queue_wait_seconds" and
+    "service_seconds"; counters include segments, characters, tokens, cache
+    hits/misses, skipped segments and retries.
+    """
+
+    def __init__(self):
+        self.counters: Dict[tuple, float] = {}
+        self.timings: Dict[tuple, list] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            timing = self.timings.setdefault(key, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def stage(self, stage: str, **labels):
+        return self.timer("stage_seconds", stage=stage, **labels)
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.timings.clear()
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                "timings": [
+                    {"name": name, "labels": dict(labels), "count": count, "sum": round(total, 6),
+                     "max": round(peak, 6)}
+                    for (name, labels), (count, total, peak) in sorted(self.timings.items())
+                ],
+            }
+
+    def merge(self, data: dict):
+        """Add a to_dict() snapshot (e.g. from a worker process) into this registry."""
+        for counter in data.get("counters", []):
+            self.inc(counter["name"], counter["value"], **counter["labels"])
+        for timing in data.get("timings", []):
+            key = _key(timing["name"], timing["labels"])
+            with self.lock:
+                current = self.timings.setdefault(key, [0, 0.0, 0.0])
+                current[0] += timing["count"]
+                current[1] += timing["sum"]
+                current[2] = max(current[2], timing["max"])
+
+    def to_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            timings = sorted(self.timings.items())
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f"{PREFIX}{name}_total"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+        for (name, labels), (count, total, _) in timings:
+            metric = f"{PREFIX}{name}"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} summary")
+                declared.add(metric)
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def report(self) -> str:
+        """One line per stage plus the main counters, for printing at the end of a run."""
+        data = self.to_dict()
+        lines = []
+        for timing in data["timings"]:
+            labels = ", ".join(f"{k}={v}" for k, v in timing["labels"].items())
+            lines.append(f"  {timing['name']}[{labels}]: {timing['sum']:.2f}s over {timing['count']}")
+        for counter in data["counters"]:
+            labels = ", ".join(f"{k}={v}" for k, v in counter["labels"].items())
+            lines.append(f"  {counter['name']}[{labels}]: {counter['value']:g}")
+        return "Metrics:\n" + "\n".join(lines)
+
+
+# Process-wide registry that the pipeline, engines and clients record into
+REGISTRY = Metrics()
@@ -0,0 +1,154 @@
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from docx import Document
+
+from batching import estimate_tokens
+from glossary import Glossary
+from docx_stream import DOCUMENT_PART, read_segments, story_parts, write_translations
+from incremental import IncrementalTranslation
+from journal import TranslationJournal
+from metrics import REGISTRY
+from segments import collect_segments, translate_segments
+from segmentation import translate_sentences
+from skiplist import SkipFilter
+
+# Segments translated between journal checkpoints when resuming is enabled
+RESUME_CHUNK_SIZE = 64
+
+
+def batch_translator(backend, max_chars: Optional[int] = None, journal=None) -> Callable[[List[str]], List[str]]:
+    """
+    Wrap a backend's translate_batch so calls respect its max_batch_size and,
+    for sentence-level backends, paragraphs are translated sentence by sentence
+    (in pieces of at most max_chars, by default the backend's max_chars option).
+    With a journal, every backend call is checkpointed as it returns.
+    Every backend call is timed and its segments, characters and estimated
+    tokens are counted in the metrics registry.
+    """
+    def call_backend(texts: List[str]) -> List[str]:
+        REGISTRY.inc("backend_segments", len(texts), backend=backend.name)
+        REGISTRY.inc("characters", sum(len(text) for text in texts), backend=backend.name)
+        REGISTRY.inc("tokens", sum(estimate_tokens(text) for text in texts), backend=backend.name)
+        with REGISTRY.timer("backend_call_seconds", backend=backend.name):
+            return backend.translate_batch(texts)
+
+    if journal is not None:
+        call_backend = journal.wrap(call_backend, chunk_size=RESUME_CHUNK_SIZE)
+
+    def translate_chunked(texts: List[str]) -> List[str]:
+        results = []
+        for start in range(0, len(texts), backend.max_batch_size):
+            results.extend(call_backend(texts[start:start + backend.max_batch_size]))
+        return results
+
+    if backend.sentence_level:
+        max_chars = max_chars or backend.options.get("max_chars", 400)
+        return lambda texts: translate_sentences(texts, translate_chunked, max_chars)
+    return translate_chunked
+
+
+def _prefilter(segments: List, skip_filter: Optional[SkipFilter], labels: dict) -> List:
+    if skip_filter is None:
+        return segments
+    with REGISTRY.stage("prefilter", **labels):
+        return skip_filter.filter(segments)
+
+
+def translate_document(input_path: str, output_path: str, backend, include_runs: bool = False,
+                       streaming: bool = False, resume: bool = False, tag_runs: bool = False,
+                       previous: Optional[Tuple[str, str]] = None, all_stories: bool = False,
+                       skip: bool = True, skip_rules: Optional[Dict[str, str]] = None,
+                       glossary: Optional[Glossary] = None) -> dict:
+    """
+    Translate one DOCX with any backend: collect segments, translate each
+    distinct text once, write the results back and save. Returns a summary
+    with timing and segment counts.
+
+    With streaming, paragraphs are read and written straight from the
+    package XML (see docx_stream) instead of through python-docx objects;
+    it translates whole paragraphs, so include_runs and tag_runs with
+    streaming raise ValueError.
+    With tag_runs, each paragraph goes to the backend once with inline run
+    tags and the translation is mapped back onto the run formatting; the
+    backend must support tags (an LLM), otherwise ValueError is raised.
+    With resume, finished segments are checkpointed to a job journal so a
+    rerun after a crash only translates the remainder.
+    With previous=(old source, old translated output), segments unchanged
+    since that revision reuse its translations and only new or edited ones
+    go to the backend.
+    With all_stories, headers, footers, footnotes, endnotes, text boxes and
+    nested tables are translated too, in the same batch as the body.
+    With skip, numbers, amounts, dates, fiscal years, ISINs, codes and text
+    already in Hindi are left as they are without reaching the backend
+    (see skiplist.SkipFilter; skip_rules replaces its rule set).
+    With a glossary, its terms are masked with placeholders before the
+    backend sees a segment and restored (or force-translated) afterwards.
+    """
+    if streaming and (include_runs or tag_runs):
+        raise ValueError("streaming translates whole paragraphs; it cannot be combined with include_runs or tag_runs")
+    if tag_runs and not backend.supports_tags:
+        raise ValueError(f"Backend '{backend.name}' does not keep run tags; tag_runs needs an LLM backend")
+    start = time.perf_counter()
+    journal = None
+    if resume:
+        journal = TranslationJournal(input_path, job_key=f"{backend.job_key}|{include_runs}|{tag_runs}|{streaming}|{all_stories}")
+    translate_batch = batch_translator(backend, journal=journal)
+    if glossary is not None:
+        translate_batch = glossary.wrap(translate_batch)
+    incremental = None
+    if previous is not None:
+        incremental = IncrementalTranslation(*previous, include_runs=include_runs, tag_runs=tag_runs)
+        translate_batch = incremental.wrap(translate_batch)
+    labels = {"backend": backend.name}
+    skip_filter = SkipFilter(skip_rules, labels=labels) if skip else None
+
+    if streaming:
+        # Loading and extraction are one streaming pass, as are writeback and saving
+        parts = story_parts(input_path) if all_stories else (DOCUMENT_PART,)
+        with REGISTRY.stage("extract", **labels):
+            segments = read_segments(input_path, parts)
+        unique = translate_segments(_prefilter(segments, skip_filter, labels), translate_batch, REGISTRY, labels)
+        with REGISTRY.stage("save", **labels):
+            write_translations(input_path, output_path, {
+                segment.address: segment.translation for segment in segments if segment.translation is not None
+            })
+    else:
+        with REGISTRY.stage("load", **labels):
+            doc = Document(input_path)
+        with REGISTRY.stage("extract", **labels):
+            segments = collect_segments(doc, include_runs=include_runs, tag_runs=tag_runs,
+                                        all_stories=all_stories)
+        unique = translate_segments(_prefilter(segments, skip_filter, labels), translate_batch, REGISTRY, labels)
+        with REGISTRY.stage("save", **labels):
+            doc.save(output_path)
+    REGISTRY.inc("documents", **labels)
+    REGISTRY.inc("segments", len(segments), **labels)
+    REGISTRY.inc("unique_segments", unique, **labels)
+
+    resumed = 0
+    if journal is not None:
+        resumed = journal.resumed
+        journal.complete()
+    return {
+        "input": input_path,
+        "output": output_path,
+        "backend": backend.name,
+        "segments": len(segments),
+        "unique": unique,
+        "skipped": skip_filter.total_skipped if skip_filter else 0,
+        "resumed": resumed,
+        "reused": incremental.reused if incremental else 0,
+        "retranslated": incremental.retranslated if incremental else unique,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def summary_line(summary: dict) -> str:
+    """One line per document for the console, from translate_document's summary."""
+    status = "ok" if summary.get("ok", True) else f"FAILED ({summary.get('error')})"
+    counts = f"{summary['unique']} unique"
+    for key in ("resumed", "reused", "skipped"):
+        if summary.get(key):
+            counts += f", {summary[key]} {key}"
+    return f"{summary['input']}: {status}, {summary['segments']} segments ({counts}) in {summary['seconds']:.1f}s"
@@ -0,0 +1,74 @@
+import json
+import re
+from typing import Dict, List, Optional
+
+PACKED_INSTRUCTIONS = (
+    "\n\nYou will receive a JSON object whose keys are item IDs and whose values are texts to translate. "
+    "Translate every value independently and reply with only a JSON object that has exactly the same keys, "
+    "each mapped to its translation. Do not merge, split, add or drop items."
+)
+
+# Per-item overhead of the JSON wrapping ("id": "...", ) in tokens
+ITEM_OVERHEAD_TOKENS = 4
+
+
+def pack_batches(texts: List[str], token_counts: List[int], max_tokens: int, max_items: int = 50) -> List[List[int]]:
+    """
+    Group text indices, in order, into batches whose estimated size stays
+    within max_tokens. A text larger than the budget gets a batch of its own.
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+    for i in range(len(texts)):
+        tokens = token_counts[i] + ITEM_OVERHEAD_TOKENS
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_payload(items: Dict[str, str]) -> str:
+    return json.dumps(items, ensure_ascii=False)
+
+
+def parse_response(content: str, ids: List[str]) -> Dict[str, str]:
+    """
+    Parse a packed response back to {id: translation}, keeping only the
+    expected IDs with non-empty string values. Anything missing is left for
+    the caller to retry.
+    """
+    content = content.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", content, re.S)
+    if fenced:
+        content = fenced.group(1)
+    try:
+        data = json.loads(content)
+    except ValueError:
+        start, end = content.find("{"), content.rfind("}")
+        if start < 0 or end <= start:
+            return {}
+        try:
+            data = json.loads(content[start:end + 1])
+        except ValueError:
+            return {}
+    if not isinstance(data, dict):
+        return {}
+    parsed = {}
+    for item_id in ids:
+        value = data.get(item_id)
+        if isinstance(value, str) and value.strip():
+            parsed[item_id] = value.strip()
+    return parsed
+
+
+def split_ids(ids: List[str]) -> Optional[List[List[str]]]:
+    if len(ids) < 2:
+        return None
+    middle = len(ids) // 2
+    return [ids[:middle], ids[middle:]]
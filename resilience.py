@@ -0,0 +1,335 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+from metrics import REGISTRY
+
+# Statuses worth retrying: timeouts, throttling and server-side failures
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+# Connection and timeout errors of clients whose exceptions are not OSError
+# subclasses (httpx under googletrans, openai), matched by class name so
+# neither package is imported here
+TRANSIENT_ERROR_NAMES = {"TransportError", "APIConnectionError", "APITimeoutError"}
+
+
+class RetryableError(Exception):
+    """An HTTP response that should be retried, with the server's Retry-After hint if it sent one."""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None, message: str = ""):
+        super().__init__(message or f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Retry-After is either delay-seconds or an HTTP date."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def check_response(response):
+    """Raise RetryableError for throttled or failed responses, otherwise return the response."""
+    if response.status_code in RETRYABLE_STATUSES:
+        raise RetryableError(response.status_code, parse_retry_after(response.headers.get("Retry-After")))
+    return response
+
+
+def _status_of(error: Exception) -> Optional[int]:
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_transient(error: Exception) -> bool:
+    """Connection failures and timeouts (requests' ConnectionError and Timeout are OSError subclasses)."""
+    if isinstance(error, (OSError, asyncio.TimeoutError)):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Retry throttling, server errors, connection failures and timeouts. Other
+    4xx responses (bad request, auth) fail the same way every time, and any
+    other exception is a bug in the client or its response handling.
+    """
+    if isinstance(error, (CircuitOpenError, DeadlineExceeded)):
+        return False
+    if isinstance(error, RetryableError):
+        return True
+    status = _status_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES or status >= 500
+    return is_transient(error)
+
+
+def retry_after_of(error: Exception) -> Optional[float]:
+    if isinstance(error, RetryableError):
+        return error.retry_after
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    return parse_retry_after(headers.get("Retry-After")) if headers else None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, capped at max_delay; a Retry-After hint takes precedence."""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 30.0,
+                 jitter: bool = True):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        ceiling = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return random.uniform(0, ceiling) if self.jitter else ceiling
+
+
+class CircuitBreaker:
+    """
+    Stop calling a backend after failure_threshold consecutive failures. Once
+    reset_timeout has passed, one trial call is let through (half-open); its
+    success closes the circuit again, its failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def release(self):
+        """End a half-open trial without counting it either way."""
+        with self.lock:
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class Deadline:
+    """A point in time after which a job stops retrying and waiting."""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def cap(self, seconds: float) -> float:
+        remaining = self.remaining()
+        return seconds if remaining is None else min(seconds, remaining)
+
+
+# One breaker per backend name, shared by every caller in the process
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, **options) -> CircuitBreaker:
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(**options)
+    return _breakers[name]
+
+
+class Resilient:
+    """
+    Call a remote backend with retries (exponential backoff with jitter,
+    honoring Retry-After), a per-backend circuit breaker and an optional
+    deadline. Counts attempts, retries and the time spent waiting.
+    """
+
+    def __init__(self, name: str, policy: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or get_breaker(name)
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def _count(self, field: str, amount=1):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def _before_attempt(self, deadline: Optional[Deadline]):
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded(f"{self.name}: deadline exceeded")
+        if not self.breaker.allow():
+            self._count("rejected")
+            REGISTRY.inc("circuit_rejections", backend=self.name)
+            raise CircuitOpenError(f"{self.name}: circuit open")
+        self._count("attempts")
+
+    def _after_failure(self, error: Exception, attempt: int, deadline: Optional[Deadline]) -> Optional[float]:
+        """Record a failed attempt and return how long to wait before the next one, or None to give up."""
+        if not is_retryable(error):
+            if _status_of(error) is not None:
+                # The service answered; the request itself is at fault
+                self.breaker.record_success()
+            else:
+                # A bug on our side says nothing about the service's health
+                self.breaker.release()
+            return None
+        self.breaker.record_failure()
+        if attempt >= self.policy.max_attempts - 1:
+            return None
+        delay = self.policy.delay(attempt, retry_after_of(error))
+        if deadline is not None and deadline.cap(delay) < delay:
+            # Waiting would run past the deadline; fail now instead
+            return None
+        print(f"{self.name} attempt {attempt + 1} failed: {error}; retrying in {delay:.1f}s")
+        self._count("retries")
+        self._count("wait_seconds", delay)
+        REGISTRY.inc("retries", backend=self.name)
+        REGISTRY.inc("retry_wait_seconds", delay, backend=self.name)
+        return delay
+
+    def call(self, fn: Callable, deadline: Optional[Deadline] = None):
+        self._count("calls")
+        attempt = 0
+        while True:
+            self._before_attempt(deadline)
+            try:
+                result = fn()
+            except Exception as e:
+                delay = self._after_failure(e, attempt, deadline)
+                if delay is None:
+                    self._count("failures")
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def acall(self, fn: Callable, deadline: Optional[Deadline] = None):
+        """Async call; fn returns a fresh awaitable per attempt, cancelled when the deadline passes."""
+        self._count("calls")
+        attempt = 0
+        while True:
+            self._before_attempt(deadline)
+            try:
+                remaining = deadline.remaining() if deadline is not None else None
+                result = await asyncio.wait_for(fn(), remaining)
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError) and deadline is not None and deadline.expired:
+                    # Cut short by our own deadline, which says nothing about the service's health;
+                    # a timeout raised by the client itself is retried below like any other
+                    self.breaker.release()
+                    self._count("failures")
+                    raise DeadlineExceeded(f"{self.name}: deadline exceeded") from e
+                delay = self._after_failure(e, attempt, deadline)
+                if delay is None:
+                    self._count("failures")
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    def poll(self, fn: Callable, deadline: Deadline, initial: float = 0.25, factor: float = 1.5,
+             max_interval: float = 5.0):
+        """
+        Call fn until it returns something other than None, starting with a
+        short interval and backing off, so fast results are picked up quickly
+        and slow ones are not hammered. Returns None at the deadline.
+        """
+        interval = initial
+        while True:
+            result = self.call(fn, deadline)
+            if result is not None:
+                return result
+            if deadline.expired:
+                return None
+            self.wait(deadline.cap(interval))
+            interval = min(max_interval, interval * factor)
+
+    def wait(self, seconds: float):
+        """Sleep between polls, counting the time as waiting."""
+        self._count("wait_seconds", seconds)
+        REGISTRY.inc("poll_wait_seconds", seconds, backend=self.name)
+        time.sleep(seconds)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "circuit": self.breaker.state,
+        }
+
+    def report(self) -> str:
+        return (f"Resilience ({self.name}): {self.calls} calls, {self.retries} retries, "
+                f"{self.failures} failed, {self.rejected} rejected by open circuit, "
+                f"{self.wait_seconds:.1f}s waiting")
@@ -0,0 +1,222 @@
+import copy
+import re
+from typing import List, Optional, Tuple
+
+from docx.oxml.ns import qn
+from lxml import etree
+
+from docx_stream import XML_SPACE, paragraph_text_nodes, set_paragraph_text
+from translation_memory import normalize_text
+
+TAG_INSTRUCTIONS = (
+    " The text may contain inline formatting tags such as <r1>...</r1>. Keep every tag exactly once, "
+    "wrapped around the translated words that correspond to the original tagged words, in natural Hindi word order."
+)
+
+TAG_TOKEN = re.compile(r"(</?r\d+>)")
+
+
+# Run children that run.text reads (as text, "\t" and "\n") and writes back, or that Word recomputes
+TEXT_CHILDREN = {qn(tag) for tag in ("w:rPr", "w:t", "w:tab", "w:cr", "w:noBreakHyphen", "w:lastRenderedPageBreak")}
+
+
+def is_text_run(run) -> bool:
+    # Only runs made of text, tabs and line breaks can be merged or rewritten through run.text safely
+    return all(
+        child.tag in TEXT_CHILDREN or child.tag == qn("w:br") and child.get(qn("w:type")) in (None, "textWrapping")
+        for child in run._r
+    )
+
+
+def run_text(run) -> str:
+    """The text a run is translated as: with tabs and line breaks for text runs, its text nodes otherwise."""
+    if is_text_run(run):
+        return run.text
+    return "".join(t.text or "" for t in run._r.findall(qn("w:t")))
+
+
+def set_run_text(run, text: str):
+    if is_text_run(run):
+        run.text = text
+        return
+    # Drawings, fields and other children stay where they are; the first text node takes the text
+    nodes = run._r.findall(qn("w:t"))
+    nodes[0].text = text
+    nodes[0].set(XML_SPACE, "preserve")
+    for node in nodes[1:]:
+        node.text = ""
+
+
+def keep_breaks(source: str, translation: str) -> str:
+    # Models tend to drop line breaks at the edges of a run's text; put the source run's back
+    if not translation.strip():
+        return translation
+    leading = source[:len(source) - len(source.lstrip("\n"))]
+    trailing = source[len(source.rstrip("\n")):]
+    return leading + translation.strip("\n") + trailing
+
+
+def run_format(run) -> bytes:
+    rpr = run._r.rPr
+    if rpr is None:
+        return b""
+    # Spell-check and revision markers split runs without changing how they look
+    rpr = copy.deepcopy(rpr)
+    for tag in ("w:lang", "w:noProof"):
+        for node in rpr.findall(qn(tag)):
+            rpr.remove(node)
+    return etree.tostring(rpr)
+
+
+def merge_groups(paragraph) -> List[list]:
+    """
+    Group adjacent text runs that look the same (Word splits runs on
+    spell-check and revision boundaries), folding whitespace-only runs into
+    their predecessor, so each group can be carried as a single run. Runs
+    whose text sits next to drawings, fields or other children form a group
+    of their own. The paragraph itself is left untouched.
+    """
+    groups = []
+    previous = None
+    for run in paragraph.runs:
+        if not is_text_run(run):
+            previous = None
+            if run._r.find(qn("w:t")) is not None:
+                groups.append([run])
+            continue
+        if previous is not None and (not run.text.strip() or run_format(run) == run_format(previous)):
+            groups[-1].append(run)
+            continue
+        groups.append([run])
+        previous = run
+    return groups
+
+
+def tag_texts(texts: List[str]) -> str:
+    """Wrap each run's text as <rN>text</rN>; a single run is sent untagged."""
+    if len(texts) == 1:
+        return texts[0]
+    return "".join(f"<r{i + 1}>{text}</r{i + 1}>" for i, text in enumerate(texts))
+
+
+def untag_text(tagged: str, count: int) -> Optional[List[Tuple[int, str]]]:
+    """
+    Parse a translated tagged string back to [(run index, text), ...] in the
+    order the runs appear in the translation. Text outside any tag joins the
+    preceding run (or the first one, if it leads). Returns None if any tag is
+    missing, repeated or unbalanced.
+    """
+    if count == 1:
+        return [(0, tagged.strip())]
+    pieces = []
+    current = None
+    seen = set()
+    leading = ""
+    for token in TAG_TOKEN.split(tagged):
+        match = re.fullmatch(r"<(/?)r(\d+)>", token)
+        if match is None:
+            if current is not None:
+                current[1] += token
+            elif pieces:
+                pieces[-1][1] += token
+            else:
+                leading += token.lstrip()
+            continue
+        index = int(match.group(2)) - 1
+        if match.group(1):
+            if current is None or current[0] != index:
+                return None
+            pieces.append(current)
+            current = None
+        else:
+            if current is not None or index in seen or not 0 <= index < count:
+                return None
+            seen.add(index)
+            current = [index, leading]
+            leading = ""
+    if current is not None or len(seen) != count:
+        return None
+    return [(index, text) for index, text in pieces]
+
+
+def split_translation(translation: str, count: int) -> List[Tuple[int, str]]:
+    pieces = untag_text(translation, count)
+    if pieces is None:
+        # Tags were lost: keep the whole translation in the first run
+        pieces = [(0, TAG_TOKEN.sub("", translation).strip())] + [(i, "") for i in range(1, count)]
+    return pieces
+
+
+def visible_format(run) -> tuple:
+    # The formatting add_translated_runs copies; enough to tell a translated run's source run apart
+    return run.bold, run.italic, run.underline, run.font.size, run.font.name
+
+
+def add_translated_runs(new_paragraph, tagged: "TaggedParagraph", translation: str):
+    """Append the translated runs of tagged to new_paragraph, copying each source run's formatting."""
+    if not tagged.runs:
+        if translation.strip():
+            new_paragraph.add_run(translation.strip())
+        return
+    for index, text in split_translation(translation, len(tagged.runs)):
+        if not text:
+            continue
+        source = tagged.runs[index]
+        new_run = new_paragraph.add_run(keep_breaks(tagged.texts[index], text))
+        new_run.bold = source.bold
+        new_run.italic = source.italic
+        new_run.underline = source.underline
+        new_run.font.size = source.font.size
+        new_run.font.name = source.font.name
+
+
+class TaggedParagraph:
+    """
+    A paragraph translated in one request with its runs marked by inline tags,
+    so the translation can be mapped back onto the original run formatting.
+
+    If the runs do not carry all of the paragraph's text (hyperlinks, fields
+    and tracked insertions hold text outside them), the paragraph is sent
+    untagged and written back whole, like a ParagraphSegment, so no text is
+    left untranslated or dropped.
+    """
+
+    def __init__(self, paragraph):
+        self.paragraph = paragraph
+        groups = merge_groups(paragraph)
+        texts = ["".join(run_text(run) for run in group) for group in groups]
+        full_text = "".join(t.text or "" for t in paragraph_text_nodes(paragraph._p))
+        covered = "".join(t.text or "" for group in groups for run in group for t in run._r.findall(qn("w:t")))
+        if covered != full_text:
+            groups, texts = [], []
+        # Each group is written through its first run; the rest are merged away in apply()
+        self.groups = [group for group, text in zip(groups, texts) if text]
+        self.texts = [text for text in texts if text]
+        self.runs = [group[0] for group in self.groups]
+        self.text = tag_texts(self.texts) if self.groups else full_text
+
+    @property
+    def key(self) -> str:
+        return normalize_text(self.text)
+
+    def apply(self, translation: str):
+        if not self.runs:
+            set_paragraph_text(self.paragraph._p, translation)
+            return
+        for group in self.groups:
+            for run in group[1:]:
+                run._r.getparent().remove(run._r)
+        pieces = split_translation(translation, len(self.runs))
+        elements = [run._r for run in self.runs]
+        for index, text in pieces:
+            set_run_text(self.runs[index], keep_breaks(self.texts[index], text))
+        # Put the run elements in the order the translation uses them
+        markers = []
+        for element in elements:
+            marker = etree.Element("marker")
+            element.addprevious(marker)
+            element.getparent().remove(element)
+            markers.append(marker)
+        for marker, (index, _) in zip(markers, pieces):
+            marker.addprevious(elements[index])
+            marker.getparent().remove(marker)
@@ -0,0 +1,108 @@
+import re
+from typing import Callable, List, Tuple
+
+# Abbreviations whose trailing period does not end a sentence
+ABBREVIATIONS = {
+    "rs", "re", "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "viz", "ie", "eg",
+    "i.e", "e.g", "inc", "ltd", "pvt", "co", "corp", "bros", "dept", "govt", "approx", "fig", "figs", "vol",
+    "sec", "cl", "para", "pp", "p", "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept",
+    "oct", "nov", "dec", "cr", "crs", "lac", "lacs", "mn", "bn", "yr", "yrs", "a.m", "p.m", "u.s", "u.k",
+}
+
+# Abbreviations that are also plain words, so they only continue the sentence before a number ("No. 5", "Art. 14")
+NUMBER_ABBREVIATIONS = {"no", "nos", "art"}
+
+# Abbreviations that often end a sentence: a capitalized word after them starts a new one ("in the U.S. Growth ...")
+FINAL_ABBREVIATIONS = {"etc", "a.m", "p.m", "u.s", "u.k"}
+
+# Candidate boundary: terminal punctuation (and closing quotes/brackets) followed by whitespace
+BOUNDARY = re.compile(r"[.!?।]+[\"')\]]*\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences without breaking on decimals ("1.5"),
+    abbreviations ("Rs. 500", "e.g. this", "No. 5") or initials ("A. K. Sharma").
+    Each sentence keeps its trailing whitespace, so "".join() of the result
+    reproduces the input exactly.
+    """
+    sentences = []
+    start = 0
+    for match in BOUNDARY.finditer(text):
+        end = match.end()
+        words = text[start:match.start() + 1].split()
+        word = words[-1].rstrip(".").lower() if words else ""
+        abbreviation = word.lstrip("(\"'")
+        following = text[end:end + 1]
+        if match.group().startswith(".") and (
+            (abbreviation in ABBREVIATIONS and not (abbreviation in FINAL_ABBREVIATIONS and following.isupper()))
+            or (abbreviation in NUMBER_ABBREVIATIONS and following.isdigit())
+            or len(word) == 1 and word.isalpha()
+            or following.islower()
+        ):
+            continue
+        sentences.append(text[start:end])
+        start = end
+    if start < len(text):
+        sentences.append(text[start:])
+    return sentences
+
+
+def chunk_long(sentence: str, max_chars: int) -> List[str]:
+    """
+    Break a sentence longer than max_chars at clause punctuation, falling back
+    to word boundaries, so no single piece exceeds the model's input window.
+    """
+    if len(sentence) <= max_chars:
+        return [sentence]
+    pieces = []
+    for part in re.split(r"(?<=[;:,])\s+", sentence):
+        while len(part) > max_chars:
+            cut = part.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(part[:cut])
+            part = part[cut:].lstrip()
+        if pieces and len(pieces[-1]) + len(part) + 1 <= max_chars:
+            pieces[-1] = pieces[-1] + " " + part
+        elif part:
+            pieces.append(part)
+    return pieces
+
+
+def segment_text(text: str, max_chars: int = 400) -> Tuple[List[str], List[str]]:
+    """
+    Split a paragraph into translation units. Returns the units (stripped)
+    and the whitespace separators that follow each one, for join_units().
+    """
+    units = []
+    separators = []
+    for sentence in split_sentences(text):
+        trailing = sentence[len(sentence.rstrip()):]
+        pieces = [piece for piece in chunk_long(sentence.strip(), max_chars) if piece]
+        for n, piece in enumerate(pieces):
+            units.append(piece)
+            separators.append(trailing if n == len(pieces) - 1 else " ")
+    return units, separators
+
+
+def join_units(translations: List[str], separators: List[str]) -> str:
+    return "".join(unit + separator for unit, separator in zip(translations, separators)).strip()
+
+
+def translate_sentences(texts: List[str], translate_batch: Callable[[List[str]], List[str]],
+                        max_chars: int = 400) -> List[str]:
+    """
+    Translate texts sentence by sentence: every text is split into sentences
+    (long ones chunked), the distinct units are sent to translate_batch in one
+    call, and each text is rejoined from its translated units.
+    """
+    layouts = [segment_text(text, max_chars) for text in texts]
+    units = list(dict.fromkeys(unit for unit_list, _ in layouts for unit in unit_list))
+    translated = dict(zip(units, translate_batch(units)))
+    results = []
+    for text, (unit_list, separators) in zip(texts, layouts):
+        if not unit_list:
+            results.append(text)
+            continue
+        results.append(join_units([translated[unit] for unit in unit_list], separators))
+    return results
@@ -0,0 +1,179 @@
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.part import XmlPart
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+
+from docx_stream import paragraph_text_nodes, set_paragraph_text
+from runs import TaggedParagraph
+from translation_memory import normalize_text
+
+
+class Segment:
+    """A piece of translatable text in a document (table cell, paragraph or run)."""
+
+    def __init__(self, element):
+        self.element = element
+        self.text = element.text
+
+    @property
+    def key(self) -> str:
+        return normalize_text(self.text)
+
+    def apply(self, translation: str):
+        self.element.text = translation
+
+
+class ParagraphSegment:
+    """
+    A paragraph whose translation is written into its own text nodes (the
+    first takes the whole text), leaving drawings, text boxes and other
+    non-text content of the paragraph in place.
+    """
+
+    def __init__(self, p):
+        self.element = p
+        self.text = "".join(t.text or "" for t in paragraph_text_nodes(p))
+
+    @property
+    def key(self) -> str:
+        return normalize_text(self.text)
+
+    def apply(self, translation: str):
+        set_paragraph_text(self.element, translation)
+
+
+def load_note_parts(doc) -> List[XmlPart]:
+    """
+    The document's footnotes and endnotes parts as XML parts. python-docx
+    loads them as opaque blobs; each is parsed once and put back under its
+    own relationship, so its paragraphs are edited and saved like the body's.
+    """
+    parts = []
+    for rel in list(doc.part.rels.values()):
+        if rel.reltype not in (RT.FOOTNOTES, RT.ENDNOTES) or rel.is_external:
+            continue
+        part = rel.target_part
+        if not isinstance(part, XmlPart):
+            xml_part = XmlPart.load(part.partname, part.content_type, part.blob, part.package)
+            for child in part.rels.values():
+                target = child.target_ref if child.is_external else child.target_part
+                xml_part.load_rel(child.reltype, target, child.rId, child.is_external)
+            doc.part.load_rel(rel.reltype, xml_part, rel.rId)
+            part = xml_part
+        parts.append(part)
+    return parts
+
+
+def story_roots(doc) -> Iterator[Tuple[str, object]]:
+    """
+    (part name, root element) of every story in the package: the body, each
+    header and footer definition (linked ones share their predecessor's),
+    footnotes and endnotes.
+    """
+    yield str(doc.part.partname), doc.element.body
+    seen = set()
+    for section in doc.sections:
+        for part in (section.header, section.first_page_header, section.even_page_header,
+                     section.footer, section.first_page_footer, section.even_page_footer):
+            if part.is_linked_to_previous:
+                continue
+            element = part._element
+            if id(element) not in seen:
+                seen.add(id(element))
+                yield str(part.part.partname), element
+    for part in load_note_parts(doc):
+        yield str(part.partname), part.element
+
+
+def collect_story_segments(doc, include_runs: bool = False, tag_runs: bool = False) -> List:
+    """
+    One segment per non-empty paragraph anywhere in the package: body,
+    headers, footers, footnotes, endnotes, table cells at any nesting depth
+    and text boxes. Paragraphs holding images are kept; only their text
+    nodes are rewritten.
+    """
+    segments = []
+    for _, root in story_roots(doc):
+        for p in root.iter(qn("w:p")):
+            segment = ParagraphSegment(p)
+            if not segment.text.strip():
+                continue
+            if tag_runs:
+                tagged = TaggedParagraph(Paragraph(p, None))
+                if tagged.text.strip():
+                    segments.append(tagged)
+            elif include_runs:
+                segments.extend(Segment(run) for run in Paragraph(p, None).runs if run.text.strip())
+            else:
+                segments.append(segment)
+    return segments
+
+
+def collect_segments(doc, include_runs: bool = False, tag_runs: bool = False,
+                     all_stories: bool = False) -> List[Segment]:
+    """
+    Gather every translatable segment of the document in reading order:
+    table cells first, then body paragraphs (skipping images). With
+    include_runs the paragraphs are split into their runs so run formatting
+    survives the write-back; with tag_runs each paragraph is sent once with
+    its runs marked by inline tags (see runs.TaggedParagraph). With
+    all_stories, every paragraph of the package is collected instead (see
+    collect_story_segments), so the whole document goes out as one batch.
+    """
+    if all_stories:
+        return collect_story_segments(doc, include_runs, tag_runs)
+    segments = []
+    seen_cells = set()
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                # Merged cells are returned once per grid position
+                if cell._tc in seen_cells:
+                    continue
+                seen_cells.add(cell._tc)
+                if cell.text.strip():
+                    segments.append(Segment(cell))
+
+    for para in doc.paragraphs:
+        if not para.text.strip() or para._element.xpath('.//w:drawing'):
+            continue
+        if tag_runs:
+            tagged = TaggedParagraph(para)
+            if tagged.text.strip():
+                segments.append(tagged)
+        elif include_runs:
+            segments.extend(Segment(run) for run in para.runs if run.text.strip())
+        else:
+            segments.append(Segment(para))
+    return segments
+
+
+def group_segments(segments: List[Segment]) -> Dict[str, List[Segment]]:
+    groups = {}
+    for segment in segments:
+        groups.setdefault(segment.key, []).append(segment)
+    return groups
+
+
+def translate_segments(segments: List[Segment], translate_batch: Callable[[List[str]], List[str]],
+                       metrics=None, labels: Optional[dict] = None) -> int:
+    """
+    Translate each distinct segment once and fan the result back out to every
+    occurrence. Occurrences are grouped by normalized text, and the first
+    one's text is sent, so line breaks inside it reach the backend. Returns
+    the number of unique texts sent to translate_batch. With metrics, the
+    "translate" and "writeback" stages are timed.
+    """
+    labels = labels or {}
+    groups = group_segments(segments)
+    keys = list(groups)
+    with metrics.stage("translate", **labels) if metrics else nullcontext():
+        translations = translate_batch([groups[key][0].text.strip() for key in keys])
+    with metrics.stage("writeback", **labels) if metrics else nullcontext():
+        for key, translation in zip(keys, translations):
+            for segment in groups[key]:
+                segment.apply(translation)
+    return len(keys)
@@ -0,0 +1,115 @@
+import json
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from metrics import REGISTRY
+from runs import TAG_TOKEN
+
+# Rules are tried in order against the whole (tag-stripped, trimmed) text;
+# the first full match names the reason a segment is passed through as is.
+# Dates are numeric only: "31 March 2024" still goes out so the month is translated.
+DEFAULT_RULES: Dict[str, str] = {
+    "symbols": r"[\W_]+",
+    "number": r"[(\-+−–]?\s*(?:[₹$€£¥]|US\$|Rs\.?|INR|USD|EUR)?\s*[(\-+−–]?\s*\d[\d,]*(?:\.\d+)?\s*\)?\s*%?",
+    "date": r"\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}|\d{4}[-/.]\d{1,2}[-/.]\d{1,2}",
+    "fiscal_year": r"(?:(?:Q[1-4]|H[12])\s?)?(?:FY|F\.Y\.)\s?'?\d{2,4}(?:\s?[-–/]\s?\d{2,4})?|\d{4}\s?[-–/]\s?\d{2}",
+    "isin": r"[A-Z]{2}[A-Z0-9]{9}\d",
+    "code": r"(?=[^a-z]*\d)[A-Z0-9]+(?:[-/._:][A-Z0-9]+)*",
+}
+
+DEVANAGARI = re.compile(r"[ऀ-ॿ]")
+LATIN = re.compile(r"[A-Za-z]")
+
+
+def load_rules(path: str) -> Dict[str, str]:
+    """
+    DEFAULT_RULES updated from a JSON object of {"name": "regex"}; a null
+    value removes a default rule, e.g. {"code": null, "cin": "[LU]\\d{5}[A-Z]{2}\\d{4}[A-Z]{3}\\d{6}"}.
+    """
+    with open(path, encoding="utf-8") as f:
+        overrides = json.load(f)
+    rules = dict(DEFAULT_RULES)
+    for name, pattern in overrides.items():
+        if pattern is None:
+            rules.pop(name, None)
+        else:
+            rules[name] = pattern
+    return rules
+
+
+class SkipFilter:
+    """
+    Classify segments that need no translation (numbers, amounts,
+    percentages, dates, fiscal years, ISINs, codes, punctuation and text that
+    is already in Hindi) so they bypass the backend entirely. Counts are kept
+    per rule for the document's report and recorded as "skipped_segments".
+    """
+
+    def __init__(self, rules: Optional[Dict[str, str]] = None, skip_hindi: bool = True,
+                 max_latin_ratio: float = 0.1, labels: Optional[dict] = None):
+        self.rules = [(name, re.compile(pattern)) for name, pattern in (DEFAULT_RULES if rules is None else rules).items()]
+        self.skip_hindi = skip_hindi
+        self.max_latin_ratio = max_latin_ratio
+        self.labels = labels or {}
+        self.skipped = Counter()
+        self.kept = 0
+
+    def classify(self, text: str) -> Optional[str]:
+        """Name of the rule that lets text pass through untranslated, or None."""
+        text = TAG_TOKEN.sub("", text).strip()
+        if not text:
+            return "empty"
+        for name, pattern in self.rules:
+            if pattern.fullmatch(text):
+                return name
+        if self.skip_hindi:
+            devanagari = len(DEVANAGARI.findall(text))
+            latin = len(LATIN.findall(text))
+            if devanagari and latin <= self.max_latin_ratio * (devanagari + latin):
+                return "hindi"
+        return None
+
+    def _count(self, rule: Optional[str]):
+        if rule is None:
+            self.kept += 1
+        else:
+            self.skipped[rule] += 1
+            REGISTRY.inc("skipped_segments", rule=rule, **self.labels)
+
+    def filter(self, segments: List) -> List:
+        """Segments that still need translating; skipped ones are left untouched in the document."""
+        kept = []
+        for segment in segments:
+            rule = self.classify(segment.text)
+            self._count(rule)
+            if rule is None:
+                kept.append(segment)
+        return kept
+
+    def wrap(self, translate_batch: Callable[[List[str]], List[str]]) -> Callable[[List[str]], List[str]]:
+        """For callers that map texts to translations: skipped texts come back unchanged."""
+        def translate(texts: List[str]) -> List[str]:
+            results = list(texts)
+            missing = []
+            for i, text in enumerate(texts):
+                rule = self.classify(text)
+                self._count(rule)
+                if rule is None:
+                    missing.append(i)
+            if missing:
+                for i, translation in zip(missing, translate_batch([texts[i] for i in missing])):
+                    results[i] = translation
+            return results
+
+        return translate
+
+    @property
+    def total_skipped(self) -> int:
+        return sum(self.skipped.values())
+
+    def report(self) -> str:
+        total = self.total_skipped + self.kept
+        reasons = ", ".join(f"{name} {count}" for name, count in self.skipped.most_common())
+        return f"Skip-list: {self.total_skipped} of {total} segments passed through untranslated" + (
+            f" ({reasons})" if reasons else "")
@@ -0,0 +1,206 @@
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+from backends import BACKENDS, TORCH_BACKENDS, load_backend
+from metrics import REGISTRY, Metrics
+from cascade import savings_report
+from pipeline import summary_line, translate_document
+from glossary import DEFAULT_PATH as GLOSSARY_PATH, load_glossary
+from skiplist import load_rules
+
+# Per-process state, populated once by init_worker so models load once per worker
+_worker = {}
+
+
+def init_worker(backend: str, threads: Optional[int], include_runs: bool, streaming: bool, resume: bool,
+                tag_runs: bool, model_options: Optional[dict] = None, all_stories: bool = False,
+                skip: bool = True, skip_rules: Optional[dict] = None, glossary_path: Optional[str] = None):
+    if threads and backend in TORCH_BACKENDS:
+        from cpu_inference import configure_threads
+        configure_threads(threads)
+    _worker["backend"] = load_backend(backend, **(model_options or {}))
+    _worker["include_runs"] = include_runs
+    _worker["streaming"] = streaming
+    _worker["resume"] = resume
+    _worker["tag_runs"] = tag_runs
+    _worker["all_stories"] = all_stories
+    _worker["skip"] = skip
+    _worker["skip_rules"] = skip_rules
+    _worker["glossary"] = load_glossary(glossary_path) if glossary_path else None
+
+
+def translate_file(input_path: str, output_path: str, previous: Optional[Tuple[str, str]] = None) -> dict:
+    start = time.perf_counter()
+    try:
+        summary = translate_document(input_path, output_path, _worker["backend"], _worker["include_runs"],
+                                     _worker["streaming"], _worker["resume"], _worker["tag_runs"], previous,
+                                     _worker["all_stories"], _worker["skip"], _worker["skip_rules"],
+                                     _worker["glossary"])
+        summary["ok"] = True
+    except Exception as e:
+        summary = {"input": input_path, "output": output_path, "ok": False, "segments": 0, "unique": 0,
+                   "error": str(e), "seconds": round(time.perf_counter() - start, 3)}
+    # Hand this file's metrics to the parent and start the next file from zero
+    summary["metrics"] = REGISTRY.to_dict()
+    REGISTRY.reset()
+    return summary
+
+
+def find_inputs(patterns: List[str], recursive: bool, output_dir: Optional[str] = None,
+                template: str = "{stem}_hindi{suffix}") -> List[str]:
+    """
+    DOCX files matched by patterns, leaving out Word lock files and any file
+    that is another match's output under output_dir/template, so a rerun
+    over the same directory does not translate its own translations.
+    """
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*.docx") if recursive else os.path.join(pattern, "*.docx")
+        paths.extend(glob.glob(pattern, recursive=recursive))
+    # Skip Word lock files (~$name.docx)
+    paths = [path for path in dict.fromkeys(paths) if not os.path.basename(path).startswith("~$")]
+    sources = {os.path.abspath(output_path_for(path, output_dir, template)): path for path in paths}
+    return sorted(path for path in paths if sources.get(os.path.abspath(path), path) == path)
+
+
+def output_path_for(input_path: str, output_dir: Optional[str], template: str) -> str:
+    stem, suffix = os.path.splitext(os.path.basename(input_path))
+    directory = output_dir or os.path.dirname(input_path)
+    return os.path.join(directory, template.format(stem=stem, suffix=suffix))
+
+
+def previous_revision(input_path: str, previous_dir: Optional[str], template: str) -> Optional[Tuple[str, str]]:
+    """The same-named source in previous_dir and its translation next to it, if both exist."""
+    if not previous_dir:
+        return None
+    old_source = os.path.join(previous_dir, os.path.basename(input_path))
+    old_output = output_path_for(old_source, None, template)
+    if os.path.exists(old_source) and os.path.exists(old_output):
+        return old_source, old_output
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Translate directories of DOCX files to Hindi across a process pool")
+    parser.add_argument("inputs", nargs="+", help="DOCX files, directories or glob patterns")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="google")
+    parser.add_argument("--output-dir", default=None, help="defaults to each input's directory")
+    parser.add_argument("--output-template", default="{stem}_hindi{suffix}",
+                        help="output file name; {stem} and {suffix} come from the input name")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--recursive", action="store_true")
+    parser.add_argument("--runs", action="store_true",
+                        help="translate paragraph runs separately to keep their formatting")
+    parser.add_argument("--tag-runs", action="store_true",
+                        help="translate each paragraph once with inline run tags and restore run formatting")
+    parser.add_argument("--streaming", action="store_true",
+                        help="read and write paragraphs directly from the DOCX XML instead of python-docx (not with --runs or --tag-runs)")
+    parser.add_argument("--resume", action="store_true",
+                        help="checkpoint finished segments so a rerun after a failure only translates the rest")
+    parser.add_argument("--all-stories", action="store_true",
+                        help="also translate headers, footers, footnotes, endnotes, text boxes and nested tables")
+    parser.add_argument("--no-skip", action="store_true",
+                        help="send numbers, codes, dates and Hindi text to the backend instead of passing them through")
+    parser.add_argument("--skip-rules", default=None,
+                        help="JSON object of skip-list rule name -> regex (null disables a default rule)")
+    parser.add_argument("--glossary", default=GLOSSARY_PATH,
+                        help="glossary file of terms to keep (one per line) or force-translate (term<TAB>translation)")
+    parser.add_argument("--previous-dir", default=None,
+                        help="directory with the previous revision of each input and its translation "
+                             "(named by --output-template); unchanged segments reuse those translations")
+    parser.add_argument("--quantize", action="store_true",
+                        help="local models only: dynamic int8 quantization of Linear layers on CPU")
+    parser.add_argument("--num-beams", type=int, default=None,
+                        help="local models only: decoding beam width (1 = greedy)")
+    parser.add_argument("--cascade-local", choices=["marian", "indictrans2"], default="marian",
+                        help="cascade only: local model tried first")
+    parser.add_argument("--cascade-llm", default="gpt4o", help="cascade only: backend for escalated segments")
+    parser.add_argument("--cascade-max-words", type=int, default=25,
+                        help="cascade only: longer segments go straight to the LLM")
+    parser.add_argument("--cascade-max-sentences", type=int, default=1,
+                        help="cascade only: segments with more sentences go straight to the LLM")
+    parser.add_argument("--cascade-min-confidence", type=float, default=0.5,
+                        help="cascade only: local translations below this confidence are redone by the LLM")
+    parser.add_argument("--summary", default=None, help="write the per-file summary as JSON to this path")
+    parser.add_argument("--metrics-json", default=None, help="write stage timings and counters as JSON")
+    parser.add_argument("--metrics-prom", default=None,
+                        help="write stage timings and counters in Prometheus text format")
+    args = parser.parse_args()
+
+    inputs = find_inputs(args.inputs, args.recursive, args.output_dir, args.output_template)
+    if not inputs:
+        print("No input documents found")
+        return
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    cores = os.cpu_count() or 1
+    if args.backend in TORCH_BACKENDS:
+        # Each worker holds its own model copy; split the cores between a few of them
+        workers = args.workers or max(1, cores // 4)
+        threads = max(1, cores // workers)
+    else:
+        # Remote backends are I/O bound, so one worker per core (or more) scales
+        workers = args.workers or cores
+        threads = None
+    model_options = {}
+    if args.backend in TORCH_BACKENDS:
+        if args.quantize:
+            model_options["quantize"] = True
+        if args.num_beams:
+            model_options["num_beams"] = args.num_beams
+    if args.backend == "cascade":
+        # Model options apply to the local half of the cascade
+        model_options = {"local": args.cascade_local, "llm": args.cascade_llm, "local_options": model_options,
+                         "max_words": args.cascade_max_words, "max_sentences": args.cascade_max_sentences,
+                         "min_confidence": args.cascade_min_confidence}
+    if args.streaming and (args.runs or args.tag_runs):
+        parser.error("--streaming translates whole paragraphs; it cannot be combined with --runs or --tag-runs")
+    if args.tag_runs and not load_backend(args.backend, **model_options).supports_tags:
+        parser.error(f"--tag-runs needs a backend that keeps run tags (an LLM), not {args.backend}")
+    workers = min(workers, len(inputs))
+    print(f"Translating {len(inputs)} documents with {args.backend} on {workers} workers")
+
+    start = time.perf_counter()
+    results = []
+    metrics = Metrics()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(args.backend, threads, args.runs, args.streaming, args.resume,
+                                       args.tag_runs, model_options, args.all_stories, not args.no_skip,
+                                       load_rules(args.skip_rules) if args.skip_rules else None,
+                                       args.glossary)) as pool:
+        futures = [
+            pool.submit(translate_file, path, output_path_for(path, args.output_dir, args.output_template),
+                        previous_revision(path, args.previous_dir, args.output_template))
+            for path in inputs
+        ]
+        for future in as_completed(futures):
+            summary = future.result()
+            metrics.merge(summary.pop("metrics"))
+            results.append(summary)
+            print(summary_line(summary))
+
+    elapsed = time.perf_counter() - start
+    succeeded = sum(1 for summary in results if summary["ok"])
+    print(f"{succeeded}/{len(results)} documents translated in {elapsed:.1f}s")
+    if args.backend == "cascade":
+        print(savings_report(metrics))
+    if args.metrics_json:
+        metrics.to_json(args.metrics_json)
+    if args.metrics_prom:
+        with open(args.metrics_prom, "w") as f:
+            f.write(metrics.to_prometheus())
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump({"backend": args.backend, "workers": workers, "seconds": round(elapsed, 3),
+                       "files": sorted(results, key=lambda summary: summary["input"])}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from metrics import REGISTRY
+
+DEFAULT_PATH = os.environ.get("TRANSLATION_MEMORY_PATH", "translation_memory.db")
+DEFAULT_MAX_ENTRIES = 200000
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class TranslationMemory:
+    """
+    On-disk translation memory shared by every backend.
+
+    Entries are keyed by a hash of (normalized source text, backend, model,
+    prompt hash, target language) and evicted least-recently-used once the
+    store grows past max_entries. Backends that score their output can keep
+    the confidence with the entry (see get_scored).
+    """
+
+    def __init__(self, backend: str, model: str = "", prompt: str = "", target_lang: str = "hi",
+                 path: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.backend = backend
+        self.model = model
+        self.prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        self.target_lang = target_lang
+        self.path = path or DEFAULT_PATH
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS memory ("
+            "key TEXT PRIMARY KEY, source TEXT, translation TEXT, backend TEXT, "
+            "model TEXT, target_lang TEXT, last_used REAL, confidence REAL)"
+        )
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(memory)")]
+        if "confidence" not in columns:
+            try:
+                self.conn.execute("ALTER TABLE memory ADD COLUMN confidence REAL")
+            except sqlite3.OperationalError:
+                # Another process added it first
+                pass
+        self.conn.execute("CREATE INDEX IF NOT EXISTS memory_last_used ON memory (last_used)")
+        self.conn.commit()
+        self._size = self.conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+
+    def _key(self, text: str, target_lang: Optional[str]) -> str:
+        parts = [normalize_text(text), self.backend, self.model, self.prompt_hash, target_lang or self.target_lang]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, text: str, target_lang: Optional[str] = None) -> Optional[str]:
+        entry = self.get_scored(text, target_lang)
+        return None if entry is None else entry[0]
+
+    def get_scored(self, text: str, target_lang: Optional[str] = None) -> Optional[Tuple[str, Optional[float]]]:
+        """(translation, confidence) for text, or None on a miss; confidence is None if it was stored without one."""
+        key = self._key(text, target_lang)
+        with self._lock:
+            row = self.conn.execute("SELECT translation, confidence FROM memory WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                REGISTRY.inc("cache_misses", backend=self.backend)
+                return None
+            self.conn.execute("UPDATE memory SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            self.hits += 1
+            REGISTRY.inc("cache_hits", backend=self.backend)
+            return row[0], row[1]
+
+    def put(self, text: str, translation: str, target_lang: Optional[str] = None,
+            confidence: Optional[float] = None):
+        with self._lock:
+            self._size += 1
+            self.conn.execute(
+                "INSERT OR REPLACE INTO memory "
+                "(key, source, translation, backend, model, target_lang, last_used, confidence) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._key(text, target_lang), normalize_text(text), translation, self.backend,
+                 self.model, target_lang or self.target_lang, time.time(), confidence)
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        # The running size is only an upper bound (replaced keys, other processes
+        # writing to the same file), so recount before deleting anything. Evict
+        # a little past the bound so the recount isn't paid on every insert.
+        if self._size <= self.max_entries:
+            return
+        self._size = self.conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+        if self._size <= self.max_entries:
+            return
+        overflow = self._size - int(self.max_entries * 0.95)
+        if overflow > 0:
+            self.conn.execute(
+                "DELETE FROM memory WHERE key IN "
+                "(SELECT key FROM memory ORDER BY last_used ASC LIMIT ?)",
+                (overflow,)
+            )
+            self._size -= overflow
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def report(self) -> str:
+        stats = self.stats()
+        return (f"Translation memory ({self.backend}): {stats['hits']} hits, "
+                f"{stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+
+    def close(self):
+        self.conn.close()
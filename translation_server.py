@@ -0,0 +1,229 @@
+import argparse
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from backends import BACKENDS, load_backend
+from glossary import DEFAULT_PATH as GLOSSARY_PATH, load_glossary
+from metrics import REGISTRY
+from pipeline import batch_translator, translate_document
+
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+class _Request:
+    __slots__ = ("texts", "done", "results", "error", "queued")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.queued = time.perf_counter()
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class BatchCoalescer:
+    """
+    Funnel translate_batch calls from any number of threads through one
+    inference thread. Requests that arrive within max_wait of each other are
+    merged (and deduplicated) into shared backend batches of up to
+    max_batch_size, so concurrent clients fill the model's batches together.
+    """
+
+    def __init__(self, backend, max_wait: float = 0.02):
+        self.backend = backend
+        self.max_wait = max_wait
+        self.requests = 0
+        self.batches = 0
+        self.queue = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        request = _Request(texts)
+        self.queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.results
+
+    def _collect(self) -> List[_Request]:
+        pending = [self.queue.get()]
+        size = len(pending[0].texts)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.backend.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(request)
+            size += len(request.texts)
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            self.requests += len(pending)
+            started = time.perf_counter()
+            for request in pending:
+                REGISTRY.observe("queue_wait_seconds", started - request.queued, backend=self.backend.name)
+            unique = list(dict.fromkeys(text for request in pending for text in request.texts))
+            try:
+                translations = {}
+                step = self.backend.max_batch_size
+                for start in range(0, len(unique), step):
+                    chunk = unique[start:start + step]
+                    with REGISTRY.timer("service_seconds", backend=self.backend.name):
+                        translations.update(zip(chunk, self.backend.translate_batch(chunk)))
+                    self.batches += 1
+                for request in pending:
+                    request.results = [translations[text] for text in request.texts]
+            except Exception as e:
+                for request in pending:
+                    request.error = e
+            for request in pending:
+                request.done.set()
+
+
+class TranslationHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health                              loaded backends and batching counters
+    GET  /metrics                             stage timings and counters in Prometheus text format
+    POST /translate  {"texts": [...], "backend": "marian"}  ->  {"translations": [...]}
+    POST /translate-docx?backend=gpt4o&tag_runs=1&all_stories=1  (DOCX body)  ->  translated DOCX
+    """
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, data: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status: int, body):
+        self._send(status, json.dumps(body, ensure_ascii=False).encode("utf-8"))
+
+    def _backend(self, name: str):
+        backend = self.server.backends.get(name or self.server.default_backend)
+        if backend is None:
+            self._send_json(400, {"error": f"backend not loaded: {name}",
+                                  "backends": sorted(self.server.backends)})
+        return backend
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/metrics":
+            self._send(200, REGISTRY.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+            return
+        if path != "/health":
+            self._send_json(404, {"error": "Not Found"})
+            return
+        self._send_json(200, {
+            "status": "ok",
+            "backends": {
+                name: {"requests": backend.requests, "batches": backend.batches}
+                for name, backend in self.server.backends.items()
+            },
+        })
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            if url.path == "/translate":
+                request = json.loads(body or b"{}")
+                backend = self._backend(request.get("backend"))
+                if backend is not None:
+                    translate = batch_translator(backend)
+                    if self.server.glossary is not None:
+                        translate = self.server.glossary.wrap(translate)
+                    self._send_json(200, {"translations": translate(request.get("texts", []))})
+            elif url.path == "/translate-docx":
+                backend = self._backend(query.get("backend"))
+                if backend is not None and query.get("tag_runs") == "1" and not backend.supports_tags:
+                    self._send_json(400, {"error": f"backend does not keep run tags: {backend.name}"})
+                elif backend is not None:
+                    self._send(200, self._translate_docx(body, backend, query.get("tag_runs") == "1",
+                                                           query.get("all_stories") == "1"), DOCX_TYPE)
+            else:
+                self._send_json(404, {"error": "Not Found"})
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+
+    def _translate_docx(self, data: bytes, backend, tag_runs: bool, all_stories: bool) -> bytes:
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, "input.docx")
+            output_path = os.path.join(directory, "output.docx")
+            with open(input_path, "wb") as f:
+                f.write(data)
+            summary = translate_document(input_path, output_path, backend, tag_runs=tag_runs,
+                                         all_stories=all_stories, glossary=self.server.glossary)
+            print(f"{backend.name}: {summary['segments']} segments ({summary['unique']} unique) "
+                  f"in {summary['seconds']:.1f}s")
+            with open(output_path, "rb") as f:
+                return f.read()
+
+
+def start_server(backends: List[str], host: str = "127.0.0.1", port: int = 8765, max_wait: float = 0.02,
+                 verbose: bool = False, glossary_path: Optional[str] = None) -> ThreadingHTTPServer:
+    """Load and warm the backends, then serve in a background thread."""
+    loaded = {}
+    for name in backends:
+        start = time.perf_counter()
+        backend = load_backend(name)
+        load_model = getattr(backend.translator, "load_model", None)
+        if load_model is not None:
+            load_model()
+        loaded[name] = BatchCoalescer(backend, max_wait)
+        print(f"Loaded {name} in {time.perf_counter() - start:.1f}s")
+
+    server = ThreadingHTTPServer((host, port), TranslationHandler)
+    server.daemon_threads = True
+    server.backends = loaded
+    server.default_backend = backends[0]
+    server.verbose = verbose
+    server.glossary = load_glossary(glossary_path) if glossary_path else None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve translation backends with models kept loaded")
+    parser.add_argument("--backends", default="marian",
+                        help=f"comma-separated backends to load; the first is the default ({', '.join(sorted(BACKENDS))})")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-wait", type=float, default=0.02,
+                        help="seconds to wait for concurrent requests to join a batch")
+    parser.add_argument("--glossary", default=GLOSSARY_PATH, help="glossary file applied to every request")
+    parser.add_argument("--verbose", action="store_true", help="log every HTTP request")
+    args = parser.parse_args()
+
+    server = start_server(args.backends.split(","), args.host, args.port, args.max_wait, args.verbose,
+                          args.glossary)
+    print(f"Translation server listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()